@@ -2,38 +2,47 @@ import heapq
 
 def a_star(start, goal, grid, avoid_knights=True):
     size = grid.size
-    open_set = []
-    heapq.heappush(open_set, (0, start))
+    last = size - 1
+    # Cells are numbered x * size + y: ints hash and compare faster than
+    # tuples, and sort the same way, so heap ties still break like (x, y)
+    start_cell = start[0] * size + start[1]
+    goal_x, goal_y = goal
+    goal_cell = goal_x * size + goal_y
+    open_set = [(0, start_cell)]
     came_from = {}
-    g_score = {start: 0}
-
-    def heuristic(a, b):
-        return abs(a[0] - b[0]) + abs(a[1] - b[1])
+    g_score = {start_cell: 0}
+    knight_cells = {k.x * size + k.y for k in grid.knights} if avoid_knights else set()
+    push, pop = heapq.heappush, heapq.heappop
 
+    # Same search as before, with the heuristic and neighbour wrap-around
+    # inlined: pathfinding is the hottest loop of Grid.update
     while open_set:
-        _, current = heapq.heappop(open_set)
+        _, current = pop(open_set)
 
-        if current == goal:
+        if current == goal_cell:
             path = []
             while current in came_from:
-                path.append(current)
+                path.append(divmod(current, size))
                 current = came_from[current]
             path.reverse()
             return path
 
-        x, y = current
-        for dx, dy in [(-1, 0), (1, 0), (0, -1), (0, 1)]:
-            nx, ny = (x + dx) % size, (y + dy) % size
-            neighbor = (nx, ny)
-
-            if avoid_knights and any(k.x == nx and k.y == ny for k in grid.knights):
+        x, y = divmod(current, size)
+        tentative_g = g_score[current] + 1
+        column = current - y
+        for neighbor, nx, ny in (
+            (current - size if x else current + last * size, x - 1 if x else last, y),
+            (current + size if x < last else y, x + 1 if x < last else 0, y),
+            (current - 1 if y else column + last, x, y - 1 if y else last),
+            (current + 1 if y < last else column, x, y + 1 if y < last else 0),
+        ):
+            if neighbor in knight_cells:
                 continue
 
-            tentative_g = g_score[current] + 1
-            if neighbor not in g_score or tentative_g < g_score[neighbor]:
+            best = g_score.get(neighbor)
+            if best is None or tentative_g < best:
                 came_from[neighbor] = current
                 g_score[neighbor] = tentative_g
-                f_score = tentative_g + heuristic(neighbor, goal)
-                heapq.heappush(open_set, (f_score, neighbor))
+                push(open_set, (tentative_g + abs(nx - goal_x) + abs(ny - goal_y), neighbor))
 
-    return []  # No path found
\ No newline at end of file
+    return []  # No path found
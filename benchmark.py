@@ -0,0 +1,87 @@
+import random
+import time
+import numpy as np
+from environment import EldoriaEnv
+from rng import GridRandom
+from world import build_world
+
+
+def bench_rng(draws: int = 1_000_000):
+    """Compare the global random module with GridRandom on the simulation's draw mix."""
+    moves = [(0, 1), (1, 0), (0, -1), (-1, 0)]
+    chase = [(1, 0), (0, 1)]
+
+    start = time.perf_counter()
+    for _ in range(draws):
+        random.random()
+        random.randint(0, 19)
+        random.choice(moves)
+        random.shuffle(chase)
+    baseline = time.perf_counter() - start
+
+    stream = GridRandom(0).movement
+    start = time.perf_counter()
+    for _ in range(draws):
+        stream.random()
+        stream.randint(0, 19)
+        stream.choice(moves)
+        stream.shuffle(chase)
+    streamed = time.perf_counter() - start
+
+    print(f"rng: random module {draws / baseline:,.0f} rounds/s, "
+          f"GridRandom {draws / streamed:,.0f} rounds/s ({baseline / streamed:.2f}x)")
+
+
+def bench_env(steps: int = 20_000, size: int = 20, hotspot_intervals=(1, 20)):
+    """Headless EldoriaEnv throughput with the player cycling through all actions."""
+    for interval in hotspot_intervals:
+        env = EldoriaEnv(size=size, hotspot_interval=interval)
+        env.reset(seed=0)
+        episodes = 1
+        start = time.perf_counter()
+        for i in range(steps):
+            _, _, done, _ = env.step(i % len(EldoriaEnv.ACTIONS))
+            if done:
+                env.reset(seed=episodes)
+                episodes += 1
+        elapsed = time.perf_counter() - start
+        print(f"env: {steps / elapsed:,.0f} steps/s on {size}x{size} with hotspots "
+              f"refit every {interval} turns ({episodes} episodes)")
+
+
+def bench_world(size: int = 1000, entities: int = 100_000):
+    """World generation time for a large board via build_world."""
+    start = time.perf_counter()
+    build_world(size, hideouts=entities // 100, hunters=entities * 3 // 10,
+                knights=entities // 5, treasures=entities // 2 - entities // 100, seed=0)
+    elapsed = time.perf_counter() - start
+    print(f"world: {entities:,} entities on {size}x{size} in {elapsed:.3f}s")
+
+
+def bench_render(size: int = 100, entities: int = 5000, frames: int = 300, zoom: int = 7):
+    """Headless pygame frame rate with every hunter and knight moving each frame."""
+    from pygame_renderer import PygameRenderer
+
+    grid = build_world(size, hideouts=entities // 100, hunters=entities * 3 // 10,
+                       knights=entities // 5, treasures=entities // 2 - entities // 100, seed=0)
+    renderer = PygameRenderer(size, cell_size=zoom, headless=True)
+    movers = grid.hunters + grid.knights
+    steps = np.random.default_rng(0).integers(-1, 2, (frames, len(movers), 2)).tolist()
+
+    elapsed = 0.0
+    for turn in range(frames):
+        for entity, (dx, dy) in zip(movers, steps[turn]):
+            entity.x = (entity.x + dx) % size
+            entity.y = (entity.y + dy) % size
+        start = time.perf_counter()
+        renderer.render(grid, turn)
+        elapsed += time.perf_counter() - start
+    renderer.close()
+    print(f"render: {frames / elapsed:,.0f} fps, {entities:,} entities on {size}x{size} at {zoom}px/cell")
+
+
+if __name__ == "__main__":
+    bench_rng()
+    bench_env()
+    bench_world()
+    bench_render()
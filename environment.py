@@ -0,0 +1,100 @@
+from typing import Optional, Tuple
+import numpy as np
+from grid import Grid
+from hunter import Hunter
+from world import build_world
+
+
+class EldoriaEnv:
+    """
+    Headless, gym-style wrapper around Grid for driving the player hunter.
+
+    Observations are occupancy planes of shape (len(CHANNELS), size, size)
+    indexed as [channel, y, x]. The same array is returned by every call to
+    reset() and step(), so copy it if an earlier frame needs to be kept.
+
+    Knight hotspots are refit every turn by default, as in the GUI. Passing
+    hotspot_interval > 1 refits every that many turns instead, which trades
+    fresher hotspots for throughput: the k-means refit is still around half
+    of an every-turn step on a 20x20 board.
+    """
+
+    CHANNELS = ("player", "hunters", "knights", "treasures", "hideouts", "hotspots")
+    # Action index -> (dx, dy), matching the arrow keys in EldoriaSimulation
+    ACTIONS = ((0, 0), (0, -1), (0, 1), (-1, 0), (1, 0))
+
+    def __init__(self, size: int = 20, hideouts: int = 3, hunters: int = 3,
+                 knights: int = 4, treasures: int = 15, max_turns: int = 1000,
+                 hotspot_interval: int = 1):
+        self.size = size
+        self.hideout_count = hideouts
+        self.hunter_count = hunters
+        self.knight_count = knights
+        self.treasure_count = treasures
+        self.max_turns = max_turns
+        self.hotspot_interval = hotspot_interval
+
+        self.observation = np.zeros((len(self.CHANNELS), size, size), dtype=np.float32)
+        self.grid: Optional[Grid] = None
+        self.player: Optional[Hunter] = None
+        self.turn_count = 0
+
+    def reset(self, seed: Optional[int] = None) -> np.ndarray:
+        """Build a new world with the same entity mix as EldoriaSimulation."""
+        self.grid = build_world(self.size, self.hideout_count, self.hunter_count,
+                                self.knight_count, self.treasure_count, seed=seed)
+        self.grid.hotspot_interval = self.hotspot_interval
+        self.turn_count = 0
+        self.player = self.grid.hunters[0] if self.grid.hunters else None
+        return self._observe()
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, dict]:
+        """Move the player by ACTIONS[action], then advance the grid one turn."""
+        if self.grid is None:
+            raise RuntimeError("reset() must be called before step()")
+
+        before = self.grid.collected_treasure_value
+        collided = False
+        if self._player_alive():
+            dx, dy = self.ACTIONS[action]
+            if dx or dy:
+                collided, _ = self.grid.move_player(self.player, dx, dy)
+
+        self.turn_count += 1
+        self.grid.update()
+
+        reward = self.grid.collected_treasure_value - before
+        done = (self.grid.is_simulation_over() or not self._player_alive() or
+                self.turn_count >= self.max_turns)
+        info = {
+            "turn": self.turn_count,
+            "collided": collided,
+            "stamina": self.player.stamina,
+            "collected_treasure_value": self.grid.collected_treasure_value,
+        }
+        return self._observe(), reward, done, info
+
+    def _player_alive(self) -> bool:
+        return self.player is not None and self.player in self.grid.hunters
+
+    def _observe(self) -> np.ndarray:
+        """Write the current grid state into the preallocated observation buffer."""
+        obs = self.observation
+        obs.fill(0.0)
+        player_plane, hunter_plane, knight_plane, treasure_plane, hideout_plane, hotspot_plane = obs
+
+        for hunter in self.grid.hunters:
+            if hunter is self.player:
+                player_plane[hunter.y, hunter.x] = 1.0
+            else:
+                hunter_plane[hunter.y, hunter.x] += 1.0
+        for knight in self.grid.knights:
+            knight_plane[knight.y, knight.x] += 1.0
+        for treasure in self.grid.treasures:
+            treasure_plane[treasure.y, treasure.x] += treasure.value
+        for hideout in self.grid.hideouts:
+            hideout_plane[hideout.y, hideout.x] = 1.0
+        for x, y in self.grid.knight_hotspots:
+            hotspot_plane[y % self.size, x % self.size] = 1.0
+
+        return obs
@@ -1,29 +1,54 @@
-from typing import List, Tuple
-import random
+from typing import Dict, Iterable, List, Optional, Tuple
 from hunter import Hunter
 from knight import Knight
 from treasure import Treasure
 from hideout import Hideout
-from sklearn.cluster import KMeans
+from rng import GridRandom
+from kmeans import kmeans
 import numpy as np
 
+# First spawn key of each kind's entity streams; the grid's own streams are children 0-3 of its seed
+ENTITY_STREAMS = {Hunter: 4, Knight: 5, Hideout: 6}
+
 class Grid:
-    def __init__(self, size: int = 20):
+    def __init__(self, size: int = 20, seed: Optional[int] = None):
         self.size = size
+        self.rng = GridRandom(seed)
+        self.hunters_added = 0  # Hunters given keys by add_hunter rather than bred
         self.hunters: List[Hunter] = []
         self.knights: List[Knight] = []
         self.treasures: List[Treasure] = []
+        self.removed_treasures: Dict[Treasure, str] = {}  # Why each left the grid: "delivered" or "expired"
         self.hideouts: List[Hideout] = []
         self.collected_treasure_value = 0
         self.knight_positions_history: List[Tuple[int, int]] = []
         self.knight_hotspots: List[Tuple[int, int]] = []
+        self.hotspot_interval = 1  # Turns between k-means refits of knight_hotspots
+        self.turn = 0
 
-    def random_empty_cell(self) -> Tuple[int, int]:
-        while True:
-            x, y = random.randint(0, self.size - 1), random.randint(0, self.size - 1)
+    def random_empty_cell(self, attempts: int = 16) -> Tuple[int, int]:
+        for _ in range(attempts):
+            x, y = self.rng.spawning.randint(0, self.size - 1), self.rng.spawning.randint(0, self.size - 1)
             if self.is_cell_empty(x, y):
                 return x, y
 
+        # Crowded board: pick straight from the free cells instead of retrying
+        free = np.flatnonzero(~self.occupied_cells())
+        if free.size == 0:
+            raise ValueError("no empty cell left on the grid")
+        cell = int(free[self.rng.spawning.randint(0, free.size - 1)])
+        return cell % self.size, cell // self.size
+
+    def occupied_cells(self) -> np.ndarray:
+        """Flat [y * size + x] mask of cells that is_cell_empty reports as taken."""
+        occupied = np.zeros(self.size * self.size, dtype=bool)
+        for h in self.hunters:
+            if not h.in_hideout:
+                occupied[h.y * self.size + h.x] = True
+        for k in self.knights:
+            occupied[k.y * self.size + k.x] = True
+        return occupied
+
     def is_cell_empty(self, x: int, y: int) -> bool:
         for h in self.hunters:
             if h.x == x and h.y == y and not h.in_hideout:
@@ -33,11 +58,21 @@ class Grid:
                 return False
         return True
 
+    # Entity keys sort in list order: bred hunters are keyed (turn, 0, hideout
+    # key) and hunters added between updates (turn, 1, n). A keyed entity
+    # draws from its own streams, so it sees the same numbers however the
+    # entities around it are stepped.
+
     def add_hunter(self, hunter: Hunter):
+        if hunter.key is None:
+            hunter.key = (self.turn, 1, self.hunters_added)
+            self.hunters_added += 1
         self.hunters.append(hunter)
         hunter.grid = self
 
     def add_knight(self, knight: Knight):
+        if knight.key is None:
+            knight.key = (len(self.knights),)
         self.knights.append(knight)
         knight.grid = self
 
@@ -45,48 +80,115 @@ class Grid:
         self.treasures.append(treasure)
 
     def add_hideout(self, hideout: Hideout):
+        if hideout.key is None:
+            hideout.key = (len(self.hideouts),)
         self.hideouts.append(hideout)
 
+    def random_for(self, entity) -> GridRandom:
+        """The entity's own streams, or the grid's for an entity that was never added."""
+        rng = entity.rng
+        if rng is None:
+            if entity.key is None:
+                return self.rng
+            # Spawned on the first draw, so building a large world stays cheap
+            rng = entity.rng = self.rng.spawn((ENTITY_STREAMS[type(entity)],) + entity.key)
+        return rng
+
+    def take_treasure(self, hunter: Hunter, treasure: Treasure):
+        self.treasures.remove(treasure)
+        hunter.collected_treasure = treasure
+
+    def deliver_treasure(self, hunter: Hunter):
+        self.collected_treasure_value += hunter.collected_treasure.value
+        self.removed_treasures[hunter.collected_treasure] = "delivered"
+        hunter.collected_treasure = None
+
+    def move_player(self, hunter: Hunter, dx: int, dy: int) -> Tuple[bool, bool]:
+        """Apply a player step, returning (collided with a knight, moved)."""
+        new_x = (hunter.x + dx) % self.size
+        new_y = (hunter.y + dy) % self.size
+
+        collided = False
+        for knight in self.knights:
+            if knight.x == new_x and knight.y == new_y:
+                hunter.stamina = max(0, hunter.stamina - 20)
+                if hunter.collected_treasure:
+                    # Drop treasure if hunter is carrying it
+                    treasure = hunter.collected_treasure
+                    treasure.x = hunter.x
+                    treasure.y = hunter.y
+                    self.add_treasure(treasure)
+                    hunter.collected_treasure = None
+                collided = True
+                break
+
+        return collided, hunter.move(self, dx, dy)
+
     def update_knight_hotspots(self):
         if len(self.knight_positions_history) >= 10:
-            data = np.array(self.knight_positions_history[-50:])
-            kmeans = KMeans(n_clusters=min(3, len(data)), random_state=42).fit(data)
-            self.knight_hotspots = [tuple(map(int, center)) for center in kmeans.cluster_centers_]
+            data = self.knight_positions_history[-50:]
+            centers = kmeans(data, min(3, len(data)), seed=42)
+            self.knight_hotspots = [tuple(map(int, center)) for center in centers.tolist()]
 
     def update(self):
-        for hunter in self.hunters[:]:
-            if not hunter.is_player:
-                hunter.take_action(self)
+        self.turn += 1
+        self.act_hunters(self.hunters)
+        self.record_knight_positions((k.x, k.y) for k in self.knights)
+
+        if self.turn % self.hotspot_interval == 0:
+            self.update_knight_hotspots()
+
+        self.rest_hunters(self.hunters)
+        self.patrol_knights(self.knights)
+        self.resolve_collisions(self.hunters, self.knights)
+        self.decay_treasures(self.treasures)
+        self.breed_hunters(self.hideouts)
+        self.share_knowledge(self.hideouts)
+
+    # Phases of update(), each over the entities it is given.
 
-        self.knight_positions_history.extend((k.x, k.y) for k in self.knights)
+    def act_hunters(self, hunters: List[Hunter]):
+        for hunter in hunters[:]:
+            self.act_hunter(hunter)
+
+    def act_hunter(self, hunter: Hunter):
+        if not hunter.is_player:
+            hunter.take_action(self)
+
+    def record_knight_positions(self, positions: Iterable[Tuple[int, int]]):
+        self.knight_positions_history.extend(positions)
         if len(self.knight_positions_history) > 100:
             self.knight_positions_history = self.knight_positions_history[-100:]
 
-        self.update_knight_hotspots()
+    def rest_hunters(self, hunters: List[Hunter]):
+        for hunter in hunters[:]:
+            self.rest_hunter(hunter)
 
-        for hunter in self.hunters[:]:
-            if not hunter.is_player:
-                hunter.take_action(self)
+    def rest_hunter(self, hunter: Hunter):
+        if not hunter.is_player:
+            hunter.take_action(self)
 
-            if hunter.in_hideout:
-                hunter.stamina = min(100, hunter.stamina + 1)
-                if hunter.stamina >= 50:
-                    hunter.in_hideout = False
+        if hunter.in_hideout:
+            hunter.stamina = min(100, hunter.stamina + 1)
+            if hunter.stamina >= 50:
+                hunter.in_hideout = False
 
-            if hunter.stamina <= 0:
-                hunter.down_steps += 1
-                if hunter.down_steps > 3:
-                    self.hunters.remove(hunter)
-            else:
-                hunter.down_steps = 0
+        if hunter.stamina <= 0:
+            hunter.down_steps += 1
+            if hunter.down_steps > 3:
+                self.hunters.remove(hunter)
+        else:
+            hunter.down_steps = 0
 
-        for knight in self.knights:
+    def patrol_knights(self, knights: List[Knight]):
+        for knight in knights:
             knight.patrol(self)
 
-        for hunter in self.hunters:
-            for knight in self.knights:
+    def resolve_collisions(self, hunters: List[Hunter], knights: List[Knight]):
+        for hunter in hunters:
+            for knight in knights:
                 if (hunter.x == knight.x and hunter.y == knight.y and not hunter.in_hideout):
-                    if random.random() < 0.5:
+                    if self.random_for(hunter).combat.random() < 0.5:
                         hunter.stamina = max(0, hunter.stamina - 5)
                     else:
                         hunter.stamina = max(0, hunter.stamina - 20)
@@ -98,19 +200,29 @@ class Grid:
                         hunter.memory_of_lost_treasure = (treasure.x, treasure.y)
                         hunter.collected_treasure = None
 
-        self.treasures = [t for t in self.treasures if t.decay()]
+    def decay_treasures(self, treasures: List[Treasure]):
+        expired = {t for t in treasures if not t.decay()}
+        self.treasures = [t for t in self.treasures if t not in expired]
+        for t in expired:
+            self.removed_treasures[t] = "expired"
 
-        for hideout in self.hideouts:
+    def breed_hunters(self, hideouts: List[Hideout]):
+        for hideout in hideouts:
             hunters_in_hideout = [h for h in self.hunters
                                   if h.x == hideout.x and h.y == hideout.y and h.in_hideout]
 
             if len(hunters_in_hideout) < hideout.capacity:
                 skill_set = {h.skill for h in hunters_in_hideout}
-                if len(skill_set) >= 2 and random.random() < 0.2:
-                    new_hunter = Hunter(hideout.x, hideout.y, random.choice(list(skill_set)))
+                breeding = self.random_for(hideout).breeding
+                if len(skill_set) >= 2 and breeding.random() < 0.2:
+                    # Sorted so the pick does not depend on string hash order
+                    new_hunter = Hunter(hideout.x, hideout.y, breeding.choice(sorted(skill_set)))
+                    if hideout.key is not None:
+                        new_hunter.key = (self.turn, 0) + hideout.key
                     self.add_hunter(new_hunter)
 
-        for hideout in self.hideouts:
+    def share_knowledge(self, hideouts: List[Hideout]):
+        for hideout in hideouts:
             resting_hunters = [h for h in self.hunters
                                if h.x == hideout.x and h.y == hideout.y and h.in_hideout]
 
@@ -3,6 +3,8 @@ class Hideout:
         self.x = x
         self.y = y
         self.capacity = 5  # Maximum hunters that can stay
+        self.key = None  # Set by Grid.add_hideout
+        self.rng = None
 
     def can_enter(self, hunter) -> bool:
         return (
@@ -1,5 +1,4 @@
 from typing import Optional
-import random
 import math
 from a_star import a_star
 
@@ -15,6 +14,8 @@ class Hunter:
         self.in_hideout = False
         self.memory_of_lost_treasure = None
         self.down_steps = 0
+        self.key = None  # Set by Grid.add_hunter
+        self.rng = None
 
         self.known_treasures = []
         self.known_hideouts = []
@@ -30,36 +31,31 @@ class Hunter:
         new_x = (self.x + dx) % grid.size
         new_y = (self.y + dy) % grid.size
 
-        if grid.is_cell_empty(new_x, new_y) or any(t.x == new_x and t.y == new_y for t in grid.treasures):
-            stamina_cost = self.skill_effects[self.skill]['stamina_cost']
-            self.stamina = max(0, self.stamina - stamina_cost)
+        treasures = grid.treasures
+        if grid.is_cell_empty(new_x, new_y) or any(t.x == new_x and t.y == new_y for t in treasures):
+            effects = self.skill_effects[self.skill]
+            self.stamina = max(0, self.stamina - effects['stamina_cost'])
 
-            move_chance = self.skill_effects[self.skill]['move_speed']
-            if random.random() < move_chance:
+            if grid.random_for(self).movement.random() < effects['move_speed']:
                 self.x = new_x
                 self.y = new_y
 
             self.collect_treasure(grid)
+            x, y = self.x, self.y
 
-            self.in_hideout = any(h.x == self.x and h.y == self.y for h in grid.hideouts)
+            self.in_hideout = any(h.x == x and h.y == y for h in grid.hideouts)
             if self.in_hideout and self.collected_treasure:
-                grid.collected_treasure_value += self.collected_treasure.value
-                self.collected_treasure = None
-
-            for t in grid.treasures:
-                if abs(t.x - self.x) <= 2 and abs(t.y - self.y) <= 2:
-                    if (t.x, t.y) not in self.known_treasures:
-                        self.known_treasures.append((t.x, t.y))
-
-            for h in grid.hideouts:
-                if abs(h.x - self.x) <= 2 and abs(h.y - self.y) <= 2:
-                    if (h.x, h.y) not in self.known_hideouts:
-                        self.known_hideouts.append((h.x, h.y))
-
-            for k in grid.knights:
-                if abs(k.x - self.x) <= 2 and abs(k.y - self.y) <= 2:
-                    if (k.x, k.y) not in self.known_knights:
-                        self.known_knights.append((k.x, k.y))
+                grid.deliver_treasure(self)
+
+            # Everything within two cells either way comes into view
+            for seen, known in ((grid.treasures, self.known_treasures),
+                                (grid.hideouts, self.known_hideouts),
+                                (grid.knights, self.known_knights)):
+                for e in seen:
+                    if x - 2 <= e.x <= x + 2 and y - 2 <= e.y <= y + 2:
+                        cell = (e.x, e.y)
+                        if cell not in known:
+                            known.append(cell)
 
             return True
         return False
@@ -68,8 +64,7 @@ class Hunter:
         if self.collected_treasure is None:
             for treasure in grid.treasures[:]:
                 if treasure.x == self.x and treasure.y == self.y:
-                    self.collected_treasure = treasure
-                    grid.treasures.remove(treasure)
+                    grid.take_treasure(self, treasure)
                     break
 
     def take_action(self, grid):
@@ -85,19 +80,22 @@ class Hunter:
                         return
 
         if not self.collected_treasure:
-            visible_treasures = [
-                t for t in grid.treasures
-                if (t.x, t.y) in self.known_treasures and t.value > 0
-            ]
-            if visible_treasures:
-                target = max(visible_treasures, key=lambda t: t.value)
+            known = set(self.known_treasures)
+            known_treasures = [t for t in grid.treasures if (t.x, t.y) in known and t.value > 0]
+            if known_treasures:
+                target = max(known_treasures, key=lambda t: t.value)
                 path = a_star((self.x, self.y), (target.x, target.y), grid)
                 if path:
                     next_x, next_y = path[0]
                     self.move(grid, next_x - self.x, next_y - self.y)
                     return
 
-        if self.collected_treasure:
+                # The richest is cut off, so head for the nearest instead
+                nearest = min(known_treasures, key=lambda t: abs(t.x - self.x) + abs(t.y - self.y))
+                path = a_star((self.x, self.y), (nearest.x, nearest.y), grid)
+            else:
+                path = []
+        else:
             known_hideouts = [
                 h for h in grid.hideouts
                 if (h.x, h.y) in self.known_hideouts
@@ -107,20 +105,10 @@ class Hunter:
                 path = a_star((self.x, self.y), (nearest.x, nearest.y), grid)
             else:
                 path = []
-        else:
-            known_treasures = [
-                t for t in grid.treasures
-                if (t.x, t.y) in self.known_treasures and t.value > 0
-            ]
-            if known_treasures:
-                nearest = min(known_treasures, key=lambda t: abs(t.x - self.x) + abs(t.y - self.y))
-                path = a_star((self.x, self.y), (nearest.x, nearest.y), grid)
-            else:
-                path = []
 
         if path:
             next_x, next_y = path[0]
             self.move(grid, next_x - self.x, next_y - self.y)
-        elif random.random() < 0.8:
-            dx, dy = random.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
+        elif grid.random_for(self).movement.random() < 0.8:
+            dx, dy = grid.random_for(self).movement.choice([(0, 1), (1, 0), (0, -1), (-1, 0)])
             self.move(grid, dx, dy)
@@ -0,0 +1,106 @@
+from functools import lru_cache
+import numpy as np
+
+
+@lru_cache(maxsize=None)
+def _plan(seed: int, k: int, n: int):
+    """
+    What k-means++ draws from RandomState(seed) for n unit-weight points.
+
+    Returns (first center index, one array of uniforms per later center,
+    unit weights as a column). The draws do not depend on the points, so they are made
+    once per seed, k and n rather than on every fit.
+    """
+    trials = 2 + int(np.log(k))
+    draws = np.random.RandomState(seed).random_sample(1 + (k - 1) * trials)
+    weights = np.ones(n)
+    cdf = (weights / weights.sum()).cumsum()
+    cdf /= cdf[-1]
+    first = int(cdf.searchsorted(draws[0], side="right"))
+    return first, [draws[1 + c * trials:1 + (c + 1) * trials] for c in range(k - 1)], weights.reshape(-1, 1)
+
+
+def _sq_distances(a, a_norms, bt, b_norms):
+    """Squared distances from the rows of a to the columns of bt, as scikit-learn's euclidean_distances."""
+    distances = -2 * (a @ bt)
+    distances += a_norms[:, None]
+    distances += b_norms
+    return np.maximum(distances, 0, out=distances)
+
+
+def kmeans(points, k: int, seed: int = 42, tol: float = 1e-4, max_iter: int = 300) -> np.ndarray:
+    """
+    Cluster centers of points, as KMeans(n_clusters=k, random_state=seed).fit(points).cluster_centers_.
+
+    A NumPy port of scikit-learn's k-means++ seeding and Lloyd iterations
+    for unit weights and one init, doing the same float operations in the
+    same order, so it returns the same centers bit for bit. On the few dozen
+    points of Grid.knight_positions_history it runs in a fraction of the
+    estimator's per-fit overhead.
+    """
+    X = np.array(points, dtype=np.float64)
+    n = len(X)
+    first, draws, weights = _plan(seed, k, n)
+
+    # Centred, as scikit-learn does for accuracy; np.var's own steps give the tolerance
+    mean = X.sum(axis=0, keepdims=True)
+    mean /= n
+    X -= mean
+    variances = (X * X).sum(axis=0) / n
+    tol = variances.sum() / len(variances) * tol
+    norms = np.einsum("ij,ij->i", X, X)
+
+    # k-means++: each later center is the best of a few candidates drawn by squared distance
+    XT = X.T
+    chosen = [first]
+    closest = _sq_distances(X[first, None], norms[first, None], XT, norms)
+    potential = closest @ weights[:, 0]
+    for uniforms in draws:
+        candidates = np.searchsorted(np.cumsum(closest), uniforms * potential)
+        np.minimum(candidates, n - 1, out=candidates)  # Rounding can step past the last point
+        distances = _sq_distances(X[candidates], norms[candidates], XT, norms)
+        np.minimum(closest, distances, out=distances)
+        potentials = distances @ weights
+        best = np.argmin(potentials)
+        potential = potentials[best]
+        closest = distances[best]
+        chosen.append(candidates[best])
+    centers = X[chosen]
+
+    # Lloyd iterations
+    columns = [np.ascontiguousarray(column) for column in XT]
+    labels_old = None
+    for _ in range(max_iter):
+        # |c|^2 - 2 x.c, leaving out |x|^2 as scikit-learn's Lloyd step does
+        labels = np.argmin(np.einsum("ij,ij->i", centers, centers) + -2 * (X @ centers.T), axis=1)
+        counts = np.bincount(labels, minlength=k)
+        # bincount adds in sample order, like scikit-learn's accumulation
+        sums = np.array([np.bincount(labels, column, k) for column in columns]).T
+
+        if counts.all():
+            sums *= (1.0 / counts)[:, None]
+        else:
+            # Restart empty clusters from the points farthest from their centers
+            far = ((X - centers[labels]) ** 2).sum(axis=1)
+            if far.max() != 0:
+                empty = np.flatnonzero(counts == 0)
+                for cluster, i in zip(empty, np.argpartition(far, -empty.size)[:-empty.size - 1:-1]):
+                    sums[labels[i]] -= X[i]
+                    sums[cluster] = X[i]
+                    counts[cluster] = 1
+                    counts[labels[i]] -= 1
+            largest = np.argmax(counts)
+            for j in range(k):
+                if counts[j] > 0:
+                    sums[j] *= 1.0 / counts[j]
+                else:
+                    sums[j] = sums[largest]  # In place and in order, as scikit-learn does
+
+        centers, previous = sums, centers
+        if labels_old is not None and labels.tobytes() == labels_old.tobytes():
+            break
+        if (np.sqrt(((centers - previous) ** 2).sum(axis=1)) ** 2).sum() <= tol:
+            break
+        labels_old = labels
+
+    return centers + mean[0]
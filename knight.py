@@ -1,6 +1,6 @@
 from collections import defaultdict
-import random
 import math
+import numpy as np
 
 class Knight:
     def __init__(self, x: int, y: int):
@@ -9,6 +9,9 @@ class Knight:
         self.energy = 100.0
         self.hunter_heatmap = defaultdict(int)
         self.grid = None  # Reference to the game grid, set during patrol
+        self.key = None  # Set by Grid.add_knight
+        self.rng = None
+        self._edge_cache = None  # (layout key, xs, ys, nearest cell by position) of retreat cells
 
     def patrol(self, grid):
         """Main patrol logic for the knight. Chooses to chase or retreat based on energy."""
@@ -34,7 +37,7 @@ class Knight:
         # Use AI hotspot prediction with 80% probability
         if (hasattr(self.grid, 'knight_hotspots') and
                 self.grid.knight_hotspots and
-                random.random() < 0.8):
+                self.grid.random_for(self).combat.random() < 0.8):
 
             hotspot_hunters = [
                 hunter for hunter in hunters
@@ -43,7 +46,7 @@ class Knight:
 
             if hotspot_hunters:
                 carrying = [h for h in hotspot_hunters if h.collected_treasure]
-                return random.choice(carrying or hotspot_hunters)
+                return self.grid.random_for(self).combat.choice(carrying or hotspot_hunters)
 
         # Fallback: Use heatmap and prioritize treasure carriers
         return max(hunters,
@@ -60,7 +63,7 @@ class Knight:
         if target.y != self.y:
             moves.append((0, 1 if target.y > self.y else -1))
 
-        random.shuffle(moves)  # Introduce movement variation
+        grid.random_for(self).movement.shuffle(moves)  # Introduce movement variation
 
         for dx, dy in moves:
             new_x = (self.x + dx) % grid.size
@@ -78,21 +81,40 @@ class Knight:
         """
         Finds the closest grid edge not blocked by hideouts and moves there to rest.
         """
-        edge_cells = []
-
-        for y in range(grid.size):
-            if not any(h.y == y for h in grid.hideouts):
-                edge_cells.extend([(0, y), (grid.size - 1, y)])
-
-        for x in range(grid.size):
-            if not any(h.x == x for h in grid.hideouts):
-                edge_cells.extend([(x, 0), (x, grid.size - 1)])
-
-        if edge_cells:
-            self.x, self.y = min(edge_cells, key=lambda pos: abs(pos[0] - self.x) + abs(pos[1] - self.y))
+        edge_xs, edge_ys = self._edge_cells(grid)
+
+        if len(edge_xs):
+            # Resting knights retreat from the same cell tick after tick
+            nearest = self._edge_cache[3]
+            cell = nearest.get((self.x, self.y))
+            if cell is None:
+                # argmin keeps the first of equally close cells, like min() over the list did
+                i = int(np.argmin(np.abs(edge_xs - self.x) + np.abs(edge_ys - self.y)))
+                cell = nearest[(self.x, self.y)] = (int(edge_xs[i]), int(edge_ys[i]))
+            self.x, self.y = cell
 
         self._rest()
 
+    def _edge_cells(self, grid):
+        """Edge cells usable for resting, cached until the hideout layout changes."""
+        key = (grid.size, tuple((h.x, h.y) for h in grid.hideouts))
+        if self._edge_cache is None or self._edge_cache[0] != key:
+            blocked_ys = {h.y for h in grid.hideouts}
+            blocked_xs = {h.x for h in grid.hideouts}
+            edge_cells = []
+
+            for y in range(grid.size):
+                if y not in blocked_ys:
+                    edge_cells.extend([(0, y), (grid.size - 1, y)])
+
+            for x in range(grid.size):
+                if x not in blocked_xs:
+                    edge_cells.extend([(x, 0), (x, grid.size - 1)])
+
+            cells = np.array(edge_cells, dtype=np.int64).reshape(-1, 2)
+            self._edge_cache = (key, cells[:, 0], cells[:, 1], {})
+        return self._edge_cache[1], self._edge_cache[2]
+
     def _rest(self):
         """Restores knight’s energy when idle or at the edge."""
         self.energy = min(100.0, self.energy + 10.0)
@@ -0,0 +1,314 @@
+"""
+Per-turn analytics over game logs written by EldoriaSimulation.
+
+The log is memory-mapped and scanned in newline-aligned chunks. Each chunk
+is parsed with vectorised NumPy byte arithmetic (the log lines have a fixed
+timestamp prefix and one-decimal percentages), and per-turn aggregates are
+streamed to the writer, so memory stays bounded by the chunk size no matter
+how large the log is.
+"""
+
+import argparse
+import mmap
+import shutil
+import tempfile
+import zipfile
+from typing import Dict, Iterator, Optional
+import numpy as np
+
+CHUNK_SIZE = 1 << 26
+PREFIX = 26  # len("2025-05-06 14:33:18,995 - ")
+STAMINA_BINS = 10
+
+COLUMNS = (
+    "game", "turn", "timestamp", "turn_seconds", "treasure_collected", "treasure_delta",
+    "hunters", "stamina_mean", "stamina_min", "stamina_max", "hunters_down",
+    "collisions", "moves",
+) + tuple(f"stamina_{10 * i:02d}" for i in range(STAMINA_BINS))
+
+CSV_FORMATS = {
+    "timestamp": "%.3f", "turn_seconds": "%.3f", "treasure_collected": "%.1f",
+    "treasure_delta": "%.1f", "stamina_mean": "%.2f", "stamina_min": "%.1f", "stamina_max": "%.1f",
+}
+
+_T, _H, _PERCENT, _CLOSE, _D, _COLON = (ord(c) for c in "TH%)d:")
+
+
+def iter_chunks(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[np.ndarray]:
+    """Yield the file as uint8 arrays that each end on a line boundary."""
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = 0
+            while start < size:
+                end = min(start + chunk_size, size)
+                if end < size:
+                    newline = mm.rfind(b"\n", start, end)
+                    if newline < 0:  # Line longer than a chunk
+                        newline = mm.find(b"\n", end)
+                    end = size if newline < 0 else newline + 1
+                yield np.frombuffer(mm[start:end], dtype=np.uint8)
+                start = end
+
+
+def _digits_back(buf: np.ndarray, stop: np.ndarray, max_digits: int = 12) -> np.ndarray:
+    """Integer value of the digit run ending just before each stop index."""
+    value = np.zeros(len(stop), dtype=np.int64)
+    active = np.ones(len(stop), dtype=bool)
+    scale = 1
+    for k in range(1, max_digits + 1):
+        digit = buf.take(stop - k) - np.uint8(48)  # Non-digits wrap to >= 10
+        active &= digit < 10
+        if not active.any():
+            break
+        value += digit.astype(np.int64) * active * scale
+        scale *= 10
+    return value
+
+
+def _percent(buf: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Parse the trailing "12.3%" of each line, given each line's end index."""
+    tenths = buf.take(end - 2).astype(np.float64) - 48
+    return _digits_back(buf, end - 3) + tenths / 10
+
+
+def _epoch_seconds(buf: np.ndarray, start: np.ndarray) -> np.ndarray:
+    """Seconds since the epoch of the "YYYY-MM-DD HH:MM:SS,mmm" line prefix."""
+    # One gather of the whole prefix, transposed so each character column is contiguous
+    digits = np.ascontiguousarray(buf.take(start[:, None] + np.arange(23)).T) - np.uint8(48)
+
+    def field(offset, width):
+        value = digits[offset].astype(np.int64)
+        for i in range(offset + 1, offset + width):
+            value = value * 10 + digits[i]
+        return value
+
+    year, month, day = field(0, 4), field(5, 2), field(8, 2)
+    # days_from_civil (proleptic Gregorian), vectorised
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    days = era * 146097 + doe - 719468
+    seconds = days * 86400 + field(11, 2) * 3600 + field(14, 2) * 60 + field(17, 2)
+    return seconds + field(20, 3) / 1000.0
+
+
+def parse_chunk(buf: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Aggregate one chunk into turn rows.
+
+    Row 0 collects lines logged before the chunk's first "Turn" line, which
+    belong to the turn left open by the previous chunk; rows 1.. are the
+    turns that start in this chunk.
+    """
+    ends = np.flatnonzero(buf == 10)
+    if len(buf) and buf[-1] != 10:
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    carriage = (ends > starts) & (buf[np.maximum(ends - 1, 0)] == 13)
+    ends = ends - carriage
+
+    long_enough = ends - starts > PREFIX + 4
+    starts, ends = starts[long_enough], ends[long_enough]
+    stamped = (buf[starts + 4] == 45) & (buf[starts + PREFIX - 2] == 45)
+    starts, ends = starts[stamped], ends[stamped]
+
+    first = buf[starts + PREFIX]
+    last = buf[ends - 1]
+    is_turn = (first == _T) & (buf[starts + PREFIX + 1] == 117) & (last == _PERCENT)
+    is_hunter = first == _H
+    is_stamina = is_hunter & (last == _PERCENT)
+    is_collision = is_hunter & (last == _D)
+    is_move = is_hunter & (last == _CLOSE)
+
+    row = np.cumsum(is_turn)
+    rows = int(row[-1]) + 1 if len(row) else 1
+
+    turn_starts, turn_ends = starts[is_turn], ends[is_turn]
+    colon = turn_starts + PREFIX + 5
+    # Turn numbers are short; find the ':' after "Turn " and parse backwards from it
+    for _ in range(12):
+        more = buf[colon] != _COLON
+        if not more.any():
+            break
+        colon = np.minimum(colon + more, len(buf) - 1)
+
+    block = {
+        "turn": np.concatenate(([-1], _digits_back(buf, colon))),
+        "timestamp": np.concatenate(([np.nan], _epoch_seconds(buf, turn_starts))),
+        "treasure_collected": np.concatenate(([np.nan], _percent(buf, turn_ends))),
+    }
+
+    stamina_row = row[is_stamina]
+    stamina = _percent(buf, ends[is_stamina])
+    block["hunters"] = np.bincount(stamina_row, minlength=rows)
+    block["stamina_sum"] = np.bincount(stamina_row, weights=stamina, minlength=rows)
+    block["stamina_min"] = np.full(rows, np.inf)
+    block["stamina_max"] = np.full(rows, -np.inf)
+    if len(stamina):
+        # Lines are in turn order, so each row's readings are one contiguous run
+        run_starts = np.flatnonzero(np.diff(stamina_row, prepend=-1))
+        run_rows = stamina_row[run_starts]
+        block["stamina_min"][run_rows] = np.minimum.reduceat(stamina, run_starts)
+        block["stamina_max"][run_rows] = np.maximum.reduceat(stamina, run_starts)
+    bins = np.clip((stamina // 10).astype(np.int64), 0, STAMINA_BINS - 1)
+    block["stamina_hist"] = np.bincount(stamina_row * STAMINA_BINS + bins,
+                                        minlength=rows * STAMINA_BINS).reshape(rows, STAMINA_BINS)
+    block["hunters_down"] = np.bincount(stamina_row[stamina <= 0], minlength=rows)
+    block["collisions"] = np.bincount(row[is_collision], minlength=rows)
+    block["moves"] = np.bincount(row[is_move], minlength=rows)
+    return block
+
+
+def _merge_open_row(open_row: Dict[str, np.ndarray], block: Dict[str, np.ndarray]):
+    """Fold block row 0 (a turn's tail lines) into the turn left open by the last chunk."""
+    for key in ("hunters", "stamina_sum", "stamina_hist", "hunters_down", "collisions", "moves"):
+        open_row[key] = open_row[key] + block[key][:1]
+    open_row["stamina_min"] = np.minimum(open_row["stamina_min"], block["stamina_min"][:1])
+    open_row["stamina_max"] = np.maximum(open_row["stamina_max"], block["stamina_max"][:1])
+
+
+def iter_turns(path: str, chunk_size: int = CHUNK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Stream per-turn aggregates as column blocks (see COLUMNS).
+
+    A new game starts whenever the turn counter does not increase, which
+    covers both restarts and separate runs appended to the same log.
+    """
+    open_row: Optional[Dict[str, np.ndarray]] = None
+    state = {"game": -1, "turn": None, "timestamp": np.nan, "treasure": 0.0}
+
+    for buf in iter_chunks(path, chunk_size):
+        block = parse_chunk(buf)
+        if open_row is not None:
+            _merge_open_row(open_row, block)
+        if len(block["turn"]) == 1:
+            continue
+
+        # Rows 1..n-1 are complete once we have seen the next turn; the last one stays open
+        rows = {key: value[1:] for key, value in block.items()}
+        if open_row is not None:
+            rows = {key: np.concatenate((open_row[key], value)) for key, value in rows.items()}
+        open_row = {key: value[-1:] for key, value in rows.items()}
+        done = {key: value[:-1] for key, value in rows.items()}
+        if len(done["turn"]):
+            yield _finish(done, state)
+
+    if open_row is not None:
+        yield _finish(open_row, state)
+
+
+def _finish(rows: Dict[str, np.ndarray], state: dict) -> Dict[str, np.ndarray]:
+    """Derive game ids, turn timing and per-turn means for complete rows."""
+    turn = rows["turn"]
+    previous_turn = np.concatenate(([state["turn"] if state["turn"] is not None else np.iinfo(np.int64).max],
+                                    turn[:-1]))
+    new_game = turn <= previous_turn
+    game = state["game"] + np.cumsum(new_game)
+
+    timestamp = rows["timestamp"]
+    previous_time = np.concatenate(([state["timestamp"]], timestamp[:-1]))
+    turn_seconds = np.where(new_game, np.nan, timestamp - previous_time)
+
+    treasure = rows["treasure_collected"]
+    previous_treasure = np.concatenate(([state["treasure"]], treasure[:-1]))
+    treasure_delta = np.where(new_game, treasure, treasure - previous_treasure)
+
+    state.update(game=int(game[-1]), turn=int(turn[-1]), timestamp=float(timestamp[-1]),
+                 treasure=float(treasure[-1]))
+
+    hunters = rows["hunters"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = rows["stamina_sum"] / hunters
+    empty = hunters == 0
+
+    out = {
+        "game": game,
+        "turn": turn,
+        "timestamp": timestamp,
+        "turn_seconds": turn_seconds,
+        "treasure_collected": treasure,
+        "treasure_delta": treasure_delta,
+        "hunters": hunters,
+        "stamina_mean": mean,
+        "stamina_min": np.where(empty, np.nan, rows["stamina_min"]),
+        "stamina_max": np.where(empty, np.nan, rows["stamina_max"]),
+        "hunters_down": rows["hunters_down"],
+        "collisions": rows["collisions"],
+        "moves": rows["moves"],
+    }
+    for i in range(STAMINA_BINS):
+        out[f"stamina_{10 * i:02d}"] = rows["stamina_hist"][:, i]
+    return out
+
+
+def write_csv(blocks: Iterator[Dict[str, np.ndarray]], out_path: str) -> int:
+    """Stream turn blocks to CSV, returning the number of turns written."""
+    row_format = ",".join(CSV_FORMATS.get(name, "%d") for name in COLUMNS) + "\n"
+    count = 0
+    with open(out_path, "w", newline="") as f:
+        f.write(",".join(COLUMNS) + "\n")
+        for block in blocks:
+            rows = zip(*(block[name].tolist() for name in COLUMNS))
+            f.writelines(map(row_format.__mod__, rows))
+            count += len(block["turn"])
+    return count
+
+
+def write_npz(blocks: Iterator[Dict[str, np.ndarray]], out_path: str) -> int:
+    """
+    Stream turn blocks to an .npz archive with one NumPy array per column.
+
+    Each column's data is appended to its own temporary file as blocks
+    arrive, then copied into the archive behind an .npy header written once
+    the row count is known, so memory stays bounded by the block size.
+    """
+    if not out_path.endswith(".npz"):
+        out_path += ".npz"  # As np.savez does
+    parts = {name: tempfile.TemporaryFile() for name in COLUMNS}
+    try:
+        dtypes = None
+        count = 0
+        for block in blocks:
+            if dtypes is None:
+                dtypes = {name: block[name].dtype for name in COLUMNS}
+            for name in COLUMNS:
+                parts[name].write(block[name].astype(dtypes[name], copy=False).tobytes())
+            count += len(block["turn"])
+        if dtypes is None:  # No turns at all
+            dtypes = {name: np.dtype(np.float64) for name in COLUMNS}
+
+        with zipfile.ZipFile(out_path, "w", zipfile.ZIP_STORED, allowZip64=True) as archive:
+            for name in COLUMNS:
+                header = {"descr": np.lib.format.dtype_to_descr(dtypes[name]),
+                          "fortran_order": False, "shape": (count,)}
+                with archive.open(name + ".npy", "w", force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(member, header)
+                    parts[name].seek(0)
+                    shutil.copyfileobj(parts[name], member)
+    finally:
+        for part in parts.values():
+            part.close()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-turn analytics for Eldoria game logs")
+    parser.add_argument("log", nargs="?", default="eldoria_game_log.txt")
+    parser.add_argument("-o", "--output", default="eldoria_turns.csv",
+                        help="output path; .npz writes columnar NumPy arrays, anything else CSV")
+    parser.add_argument("--chunk-mb", type=int, default=CHUNK_SIZE >> 20)
+    args = parser.parse_args(argv)
+
+    blocks = iter_turns(args.log, args.chunk_mb << 20)
+    writer = write_npz if args.output.endswith(".npz") else write_csv
+    count = writer(blocks, args.output)
+    print(f"Wrote {count} turns to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,29 @@
+import argparse
 import tkinter as tk
 from tkinter import ttk
-import random
 import logging
-from grid import Grid
-from hunter import Hunter
-from knight import Knight
-from hideout import Hideout
-from treasure import Treasure
+from world import build_world
+from stream import StateClient, StatePublisher
+from viewport import Viewport, density_image, ppm_bytes
+
+MAX_CANVAS = 720  # Larger maps scroll and zoom inside a canvas of at most this size
+SERVE_INTERVAL = 100  # ms between publisher.serve() calls, paused or not
 
 # Set up logging
 logging.basicConfig(filename="eldoria_game_log.txt", level=logging.INFO,
                     format="%(asctime)s - %(message)s")
 
 class EldoriaSimulation:
-    def __init__(self, size=20):
+    def __init__(self, size=20, seed=None, publish_port=None, connect=None):
+        # Viewer mode: mirror a game published by another process
+        self.client = None
+        if connect is not None:
+            self.client = StateClient(*connect)
+            self.client.wait_for_keyframe()
+            if not self.client.view.synced:
+                raise SystemExit(f"No game state received from {connect[0]}:{connect[1]}")
+            size = self.client.view.size
+
         self.root = tk.Tk()
         self.root.title("Knights of Eldoria - Treasure Collector")
 
@@ -23,10 +33,15 @@ class EldoriaSimulation:
         self.paused = False
         self.cell_size = 30
         self.grid_size = size
+        self.seed = seed
+        self.publisher = StatePublisher(port=publish_port) if publish_port is not None else None
+        if self.publisher:
+            logging.info(f"Publishing game state on {self.publisher.address[0]}:{self.publisher.address[1]}")
 
         # Calculate window dimensions
-        self.canvas_width = self.grid_size * self.cell_size
-        self.canvas_height = self.grid_size * self.cell_size
+        self.canvas_width = min(self.grid_size * self.cell_size, MAX_CANVAS)
+        self.canvas_height = min(self.grid_size * self.cell_size, MAX_CANVAS)
+        self.viewport = Viewport(self.grid_size, self.canvas_width, self.canvas_height, zoom=self.cell_size)
         self.window_height = self.canvas_height + 120  # Space for controls
 
         # Initialize UI and simulation
@@ -35,7 +50,10 @@ class EldoriaSimulation:
 
         # Set window size and start the simulation
         self.root.geometry(f"{self.canvas_width}x{self.window_height}")
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.root.after(self.game_speed, self.update)
+        if self.publisher:
+            self.root.after(SERVE_INTERVAL, self.serve_viewers)
         self.root.mainloop()
 
     def setup_ui(self):
@@ -80,88 +98,125 @@ class EldoriaSimulation:
         button_frame.pack(side=tk.RIGHT)
         tk.Button(button_frame, text="Pause", command=self.toggle_pause).pack(side=tk.LEFT, padx=5)
         tk.Button(button_frame, text="Restart", command=self.restart).pack(side=tk.LEFT)
+        self.follow_player = tk.BooleanVar(value=self.grid_size * self.cell_size > MAX_CANVAS)
+        tk.Checkbutton(button_frame, text="Follow player", variable=self.follow_player).pack(side=tk.LEFT, padx=5)
 
         # Key bindings
         self.root.bind("<Key>", self.handle_key)
 
+        # Viewport: wheel or +/- to zoom, drag to pan
+        self.drag_origin = (0, 0)
+        self.canvas.bind("<MouseWheel>", self.on_wheel)
+        self.canvas.bind("<Button-4>", self.on_wheel)
+        self.canvas.bind("<Button-5>", self.on_wheel)
+        self.canvas.bind("<ButtonPress-1>", self.on_drag_start)
+        self.canvas.bind("<B1-Motion>", self.on_drag)
+
     def setup_simulation(self):
         """Initialize the game state with grid, entities, and treasures"""
-        self.grid = Grid(self.grid_size)
-        self.turn_count = 0
+        if self.client:
+            self.grid = self.client.view
+            self.turn_count = self.grid.turn
+            return
 
-        # Add hideouts
-        for _ in range(3):
-            x, y = self.grid.random_empty_cell()
-            self.grid.add_hideout(Hideout(x, y))
-
-        # Add hunters with different skills
-        skills = ["navigation", "endurance", "stealth"]
-        for i, skill in enumerate(skills):
-            x, y = self.grid.random_empty_cell()
-            hunter = Hunter(x, y, skill)
-            if i == 0:  # The first hunter is the player
-                hunter.is_player = True
-            self.grid.add_hunter(hunter)
-
-        # Add knights
-        for _ in range(4):
-            x, y = self.grid.random_empty_cell()
-            self.grid.add_knight(Knight(x, y))
-
-        # Add treasures
-        for _ in range(15):
-            x, y = self.grid.random_empty_cell()
-            value = random.choice([3, 7, 13])
-            self.grid.add_treasure(Treasure(x, y, value))
+        # Hideouts, hunters (the first is the player), knights and treasures
+        self.grid = build_world(self.grid_size, hideouts=3, hunters=3, knights=4,
+                                treasures=15, seed=self.seed)
+        self.turn_count = 0
+        logging.info(f"Seed: {self.grid.rng.seed}")
+        if self.publisher:
+            self.publisher.publish(self.grid, self.turn_count)
 
     def draw(self):
-        """Render all game elements to the canvas"""
+        """Render the visible part of the grid to the canvas"""
         self.canvas.delete("all")
-
-        # Draw grid lines
-        for i in range(self.grid_size + 1):
-            self.canvas.create_line(i * self.cell_size, 0, i * self.cell_size, self.canvas_height, fill="#f0f0f0")
-            self.canvas.create_line(0, i * self.cell_size, self.canvas_width, i * self.cell_size, fill="#f0f0f0")
-
-        # Draw all entities in the correct order
-        self.draw_hideouts()
-        self.draw_treasures()
-        self.draw_knights()
-        self.draw_hunters()
+        if self.follow_player.get() and self.grid.hunters:
+            player = self.grid.hunters[0]
+            self.viewport.center_on(player.x, player.y)
+        bounds = self.viewport.bounds()
+
+        if self.viewport.dense:
+            # Zoomed far out: one image pixel per cell instead of canvas items
+            self.draw_density(bounds)
+        else:
+            # Draw grid lines
+            x0, y0, x1, y1 = bounds
+            left, top = self.viewport.to_screen(x0, y0)
+            right, bottom = self.viewport.to_screen(x1, y1)
+            for i in range(x0, x1 + 1):
+                x = self.viewport.to_screen(i, y0)[0]
+                self.canvas.create_line(x, top, x, bottom, fill="#f0f0f0")
+            for i in range(y0, y1 + 1):
+                y = self.viewport.to_screen(x0, i)[1]
+                self.canvas.create_line(left, y, right, y, fill="#f0f0f0")
+
+            # Draw all entities in the correct order
+            self.draw_hideouts(bounds)
+            self.draw_treasures(bounds)
+            self.draw_knights(bounds)
+            self.draw_hunters(bounds)
 
         # Display turn count
         self.canvas.create_text(10, 10, text=f"Turn: {self.turn_count}", font=("Arial", 10), anchor=tk.NW)
 
-    def draw_hideouts(self):
+    def draw_density(self, bounds):
+        """Render the visible cells as a density image built with NumPy"""
+        zoom = self.viewport.zoom
+        block = max(1, round(1 / zoom))
+        image = tk.PhotoImage(data=ppm_bytes(density_image(self.grid, bounds, block)), format="PPM")
+        if zoom > 1:
+            image = image.zoom(int(zoom))
+        self.density_photo = image  # Tk only keeps a weak reference
+        x, y = self.viewport.to_screen(bounds[0], bounds[1])
+        self.canvas.create_image(x, y, image=image, anchor=tk.NW)
+
+    @staticmethod
+    def in_bounds(entity, bounds):
+        x0, y0, x1, y1 = bounds
+        return x0 <= entity.x < x1 and y0 <= entity.y < y1
+
+    def draw_hideouts(self, bounds):
         """Render hideouts on the grid"""
+        size = self.viewport.zoom
+        inset = max(1, size / 15)
         for hideout in self.grid.hideouts:
-            x1 = hideout.x * self.cell_size + 2
-            y1 = hideout.y * self.cell_size + 2
-            x2 = (hideout.x + 1) * self.cell_size - 2
-            y2 = (hideout.y + 1) * self.cell_size - 2
-            self.canvas.create_rectangle(x1, y1, x2, y2, fill="#4CAF50", outline="black", width=2)
+            if not self.in_bounds(hideout, bounds):
+                continue
+            x, y = self.viewport.to_screen(hideout.x, hideout.y)
+            self.canvas.create_rectangle(x + inset, y + inset, x + size - inset, y + size - inset,
+                                         fill="#4CAF50", outline="black", width=2 if size >= 15 else 1)
 
-    def draw_treasures(self):
+    def draw_treasures(self, bounds):
         """Render treasures on the grid"""
+        size = self.viewport.zoom
+        star_font = ("Arial", max(6, int(18 * size / 30)))
         for treasure in self.grid.treasures:
-            x = (treasure.x + 0.5) * self.cell_size
-            y = (treasure.y + 0.5) * self.cell_size
-            self.canvas.create_text(x, y, text="★", fill="#FFD700", font=("Arial", 18))
-            self.canvas.create_text(x, y + 10, text=f"{treasure.value:.1f}%", fill="black", font=("Arial", 7))
-
-    def draw_knights(self):
+            if not self.in_bounds(treasure, bounds):
+                continue
+            x, y = self.viewport.to_screen(treasure.x + 0.5, treasure.y + 0.5)
+            self.canvas.create_text(x, y, text="★", fill="#FFD700", font=star_font)
+            if size >= 20:
+                self.canvas.create_text(x, y + size / 3, text=f"{treasure.value:.1f}%", fill="black", font=("Arial", 7))
+
+    def draw_knights(self, bounds):
         """Render knights on the grid"""
+        size = self.viewport.zoom
         for knight in self.grid.knights:
-            x = knight.x * self.cell_size
-            y = knight.y * self.cell_size
+            if not self.in_bounds(knight, bounds):
+                continue
+            x, y = self.viewport.to_screen(knight.x, knight.y)
             self.canvas.create_polygon(
-                x + 5, y + 25, x + 15, y + 5, x + 25, y + 25,
-                fill="#F44336", outline="black", width=2
+                x + size / 6, y + size * 5 / 6, x + size / 2, y + size / 6, x + size * 5 / 6, y + size * 5 / 6,
+                fill="#F44336", outline="black", width=2 if size >= 15 else 1
             )
 
-    def draw_hunters(self):
+    def draw_hunters(self, bounds):
         """Render hunters on the grid"""
+        size = self.viewport.zoom
+        inset = size / 6
         for i, hunter in enumerate(self.grid.hunters):
+            if not self.in_bounds(hunter, bounds):
+                continue
             if hunter.in_hideout:
                 fill = "#A5D6A7"  # Light green when in hideout
             elif hunter.collected_treasure:
@@ -170,37 +225,53 @@ class EldoriaSimulation:
                 fill = "#f0f0f0" if i == 0 else "#2196F3"  # Default colors for others
 
             outline = "red" if i == 0 else "black"
-            x = hunter.x * self.cell_size
-            y = hunter.y * self.cell_size
+            x, y = self.viewport.to_screen(hunter.x, hunter.y)
 
             # Draw hunter
             self.canvas.create_oval(
-                x + 5, y + 5, x + self.cell_size - 5, y + self.cell_size - 5,
+                x + inset, y + inset, x + size - inset, y + size - inset,
                 fill=fill, outline=outline, width=3 if i == 0 else 1
             )
 
             # Hunter number and treasure info
-            self.canvas.create_text(x + self.cell_size // 2, y + self.cell_size // 2, text=str(i + 1), fill="black", font=("Arial", 8, "bold"))
+            if size < 20:
+                continue
+            self.canvas.create_text(x + size / 2, y + size / 2, text=str(i + 1), fill="black", font=("Arial", 8, "bold"))
             if hunter.collected_treasure:
                 self.canvas.create_text(
-                    x + self.cell_size // 2, y, text=f"{hunter.collected_treasure.value:.1f}%",
+                    x + size / 2, y, text=f"{hunter.collected_treasure.value:.1f}%",
                     fill="gold", font=("Arial", 8, "bold")
                 )
 
+    def on_wheel(self, event):
+        """Zoom around the mouse pointer"""
+        up = event.num == 4 or getattr(event, "delta", 0) > 0
+        self.viewport.zoom_at(event.x, event.y, 1.25 if up else 0.8)
+        self.draw()
+
+    def on_drag_start(self, event):
+        self.drag_origin = (event.x, event.y)
+        self.follow_player.set(False)
+
+    def on_drag(self, event):
+        """Pan the map with the mouse"""
+        self.viewport.pan(event.x - self.drag_origin[0], event.y - self.drag_origin[1])
+        self.drag_origin = (event.x, event.y)
+        self.draw()
+
     def update(self):
         """Update the game state each turn"""
+        if self.client:
+            self.update_from_stream()
+            return
+
         if not self.paused:
             self.turn_count += 1
             self.grid.update()
+            if self.publisher:
+                self.publisher.publish(self.grid, self.turn_count)
             self.draw()
-
-            # Update UI
-            self.score_label.config(text=f"Treasure Collected: {self.grid.collected_treasure_value:.1f}%")
-            for i, hunter in enumerate(self.grid.hunters):
-                status = f"Hunter {i + 1}: {hunter.stamina:.1f}%"
-                if hunter.collected_treasure:
-                    status += f" (Carrying: {hunter.collected_treasure.value:.1f}%)"
-                self.hunter_labels[i].config(text=status)
+            self.update_stats()
 
             logging.info(f"Turn {self.turn_count}: Treasure collected: {self.grid.collected_treasure_value:.1f}%")
             for i, hunter in enumerate(self.grid.hunters):
@@ -210,10 +281,56 @@ class EldoriaSimulation:
                 self.root.after(self.game_speed, self.update)
             else:
                 self.show_game_over()
+                self.close_publisher()  # Viewers see the stream end with the game
+
+    def serve_viewers(self):
+        """Let viewers attach and catch up even while no turns are played"""
+        if self.publisher:
+            self.publisher.serve()
+            self.root.after(SERVE_INTERVAL, self.serve_viewers)
+
+    def close_publisher(self):
+        if self.publisher:
+            self.publisher.close()
+            self.publisher = None
+
+    def on_close(self):
+        """Close the stream connections along with the window"""
+        self.close_publisher()
+        if self.client:
+            self.client.close()
+        self.root.destroy()
+
+    def update_from_stream(self):
+        """Redraw from the published state stream (viewer mode)"""
+        if self.client.poll():
+            self.turn_count = self.grid.turn
+            self.draw()
+            self.update_stats()
+
+        if self.client.closed:
+            self.show_game_over()
+        else:
+            self.root.after(50, self.update)
+
+    def update_stats(self):
+        """Refresh the score and hunter labels"""
+        self.score_label.config(text=f"Treasure Collected: {self.grid.collected_treasure_value:.1f}%")
+        for i, (label, hunter) in enumerate(zip(self.hunter_labels, self.grid.hunters)):
+            status = f"Hunter {i + 1}: {hunter.stamina:.1f}%"
+            if hunter.collected_treasure:
+                status += f" (Carrying: {hunter.collected_treasure.value:.1f}%)"
+            label.config(text=status)
 
     def handle_key(self, event):
         """Handle keyboard input to move the player"""
-        if not self.grid.hunters or self.paused:
+        if event.keysym in ("plus", "equal", "minus", "KP_Add", "KP_Subtract"):
+            zoom_in = event.keysym in ("plus", "equal", "KP_Add")
+            self.viewport.zoom_at(self.canvas_width / 2, self.canvas_height / 2, 1.25 if zoom_in else 0.8)
+            self.draw()
+            return
+
+        if self.client or not self.grid.hunters or self.paused:
             return
 
         hunter = self.grid.hunters[0]  # Player hunter
@@ -233,22 +350,11 @@ class EldoriaSimulation:
         # Handle knight collision and movement
         new_x = (hunter.x + dx) % self.grid.size
         new_y = (hunter.y + dy) % self.grid.size
+        collided, moved = self.grid.move_player(hunter, dx, dy)
 
-        for knight in self.grid.knights:
-            if knight.x == new_x and knight.y == new_y:
-                hunter.stamina = max(0, hunter.stamina - 20)
-                if hunter.collected_treasure:
-                    # Drop treasure if hunter is carrying it
-                    treasure = hunter.collected_treasure
-                    treasure.x = hunter.x
-                    treasure.y = hunter.y
-                    self.grid.add_treasure(treasure)
-                    hunter.collected_treasure = None
-                logging.info(f"Hunter {hunter} collided with Knight at ({new_x}, {new_y}), stamina reduced")
-                break
-
-        # Move hunter and handle collection
-        if hunter.move(self.grid, dx, dy):
+        if collided:
+            logging.info(f"Hunter {hunter} collided with Knight at ({new_x}, {new_y}), stamina reduced")
+        if moved:
             logging.info(f"Hunter {hunter} moved to ({hunter.x}, {hunter.y})")
 
     def toggle_pause(self):
@@ -258,8 +364,9 @@ class EldoriaSimulation:
 
     def restart(self):
         """Restart the game"""
+        if self.client:
+            return
         logging.info("Game restarted.")
-        self.grid.reset()
         self.setup_simulation()
 
     def show_game_over(self):
@@ -268,5 +375,32 @@ class EldoriaSimulation:
         self.canvas.create_text(self.canvas_width // 2, self.canvas_height // 2,
                                text="Game Over!", fill="red", font=("Arial", 24, "bold"))
 
-# Run the simulation
-EldoriaSimulation()
+def parse_address(value):
+    host, _, port = value.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Knights of Eldoria - Treasure Collector")
+    parser.add_argument("--size", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--publish", type=int, metavar="PORT",
+                        help="publish the game state stream on this localhost port")
+    parser.add_argument("--connect", type=parse_address, metavar="HOST:PORT",
+                        help="watch a game published by another process")
+    parser.add_argument("--renderer", choices=("tk", "pygame"), default="tk")
+    parser.add_argument("--headless", action="store_true",
+                        help="pygame only: render offscreen with the dummy video driver")
+    parser.add_argument("--frames", type=int, metavar="N",
+                        help="pygame only: render N frames as fast as possible, then report fps")
+    parser.add_argument("--capture", metavar="DIR",
+                        help="pygame only: save every rendered frame as a PNG in DIR")
+    args = parser.parse_args()
+
+    # Run the simulation
+    if args.renderer == "pygame":
+        from pygame_renderer import PygameSimulation
+        PygameSimulation(args.size, args.seed, publish_port=args.publish, connect=args.connect,
+                         headless=args.headless, frames=args.frames, capture_dir=args.capture)
+    else:
+        EldoriaSimulation(args.size, args.seed, publish_port=args.publish, connect=args.connect)
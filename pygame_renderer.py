@@ -0,0 +1,450 @@
+import logging
+import os
+import time
+from typing import Optional
+import numpy as np
+from viewport import Viewport, density_image
+
+HUD_HEIGHT = 30
+MAX_WINDOW = 720
+BACKGROUND = (255, 255, 255)
+GRID_LINE = (0xF0, 0xF0, 0xF0)
+
+# Sprite atlas slots; hunters are HUNTER + state + (PLAYER_OFFSET if player)
+HIDEOUT, TREASURE, KNIGHT, HUNTER = 0, 1, 2, 3
+CARRYING, RESTING = 1, 2
+PLAYER_OFFSET = 3
+SPRITE_COUNT = 9
+
+HUNTER_FILLS = {0: (0x21, 0x96, 0xF3), CARRYING: (0xFF, 0xF1, 0x76), RESTING: (0xA5, 0xD6, 0xA7)}
+PLAYER_FILLS = {0: (0xF0, 0xF0, 0xF0), CARRYING: (0xFF, 0xF1, 0x76), RESTING: (0xA5, 0xD6, 0xA7)}
+
+
+def _pygame(headless: bool):
+    """Import and initialise pygame, using the dummy video driver when headless."""
+    if headless:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    import pygame
+    pygame.display.init()
+    pygame.font.init()
+    return pygame
+
+
+class PygameRenderer:
+    """
+    Pygame backend for drawing a Grid (or a stream.StateView).
+
+    Sprites for every entity kind and hunter state are baked into one atlas
+    surface per zoom level. Each frame the visible entities become an array
+    of (cell, sprite) keys; only cells whose keys changed since the last
+    frame are repainted, with a single Surface.blits() call, and only those
+    rects are pushed to the display. The view pans in whole cells, so when
+    it follows the player the map image is scrolled and only the cells
+    scrolled into view are painted.
+    """
+
+    def __init__(self, grid_size: int, cell_size: int = 30, headless: bool = False):
+        self.pygame = _pygame(headless)
+        width = min(grid_size * cell_size, MAX_WINDOW)
+        height = min(grid_size * cell_size, MAX_WINDOW)
+        self.screen = self.pygame.display.set_mode((width, height + HUD_HEIGHT))
+        self.pygame.display.set_caption("Knights of Eldoria - Treasure Collector")
+        self.map_rect = self.pygame.Rect(0, HUD_HEIGHT, width, height)
+        self.viewport = Viewport(grid_size, width, height, zoom=cell_size)
+        self.font = self.pygame.font.Font(None, 20)
+
+        self.atlas = None
+        self.atlas_zoom = None
+        self.areas = []
+        self.background = None
+        self._cell = None  # Cell size in pixels the map was last drawn at
+        self._origin = (0, 0)  # Top-left cell on screen
+        self._bounds = (0, 0, 0, 0)
+        self._keys: Optional[np.ndarray] = None
+        self._hud_text = None
+
+    def build_atlas(self, cell: int):
+        """Bake every sprite for the given cell size into one surface."""
+        pygame = self.pygame
+        atlas = pygame.Surface((cell * SPRITE_COUNT, cell), pygame.SRCALPHA)
+        atlas.fill((0, 0, 0, 0))
+
+        def slot(index):
+            return pygame.Rect(index * cell, 0, cell, cell)
+
+        inset = max(1, cell // 15)
+        border = 2 if cell >= 15 else 1
+        hideout = slot(HIDEOUT).inflate(-2 * inset, -2 * inset)
+        pygame.draw.rect(atlas, (0x4C, 0xAF, 0x50), hideout)
+        pygame.draw.rect(atlas, (0, 0, 0), hideout, border)
+
+        x = slot(TREASURE).x
+        r_outer, r_inner = cell * 0.4, cell * 0.16
+        star = []
+        for i in range(10):
+            angle = np.pi / 2 + i * np.pi / 5
+            radius = r_outer if i % 2 == 0 else r_inner
+            star.append((x + cell / 2 + radius * np.cos(angle), cell / 2 - radius * np.sin(angle)))
+        pygame.draw.polygon(atlas, (0xFF, 0xD7, 0x00), star)
+
+        x = slot(KNIGHT).x
+        knight = [(x + cell / 6, cell * 5 / 6), (x + cell / 2, cell / 6), (x + cell * 5 / 6, cell * 5 / 6)]
+        pygame.draw.polygon(atlas, (0xF4, 0x43, 0x36), knight)
+        pygame.draw.polygon(atlas, (0, 0, 0), knight, border)
+
+        for player, fills in ((False, HUNTER_FILLS), (True, PLAYER_FILLS)):
+            for state, fill in fills.items():
+                rect = slot(HUNTER + state + (PLAYER_OFFSET if player else 0)).inflate(-cell // 3, -cell // 3)
+                pygame.draw.ellipse(atlas, fill, rect)
+                pygame.draw.ellipse(atlas, (255, 0, 0) if player else (0, 0, 0), rect,
+                                    min(3, max(1, cell // 10)) if player else 1)
+
+        self.atlas = atlas.convert_alpha() if pygame.display.get_surface() else atlas
+        self.atlas_zoom = cell
+        self.areas = [slot(i) for i in range(SPRITE_COUNT)]
+
+    def _build_background(self, cell: int):
+        """Map background (white with grid lines every cell pixels)."""
+        pygame = self.pygame
+        background = pygame.Surface(self.map_rect.size)
+        background.fill(BACKGROUND)
+        if cell >= 8:
+            width, height = self.map_rect.size
+            for x in range(0, width + 1, cell):
+                pygame.draw.line(background, GRID_LINE, (x, 0), (x, height))
+            for y in range(0, height + 1, cell):
+                pygame.draw.line(background, GRID_LINE, (0, y), (width, y))
+        self.background = background
+
+    def _cell_bounds(self, origin, cell: int):
+        """Cells (x0, y0, x1, y1) shown with the top-left cell at origin."""
+        x0, y0 = origin
+        size = self.viewport.grid_size
+        return (x0, y0, min(size, x0 + -(-self.map_rect.width // cell)),
+                min(size, y0 + -(-self.map_rect.height // cell)))
+
+    def _sprite_keys(self, grid, bounds) -> np.ndarray:
+        """
+        Sorted unique cell * SPRITE_COUNT + sprite keys of the visible entities.
+
+        Cells are numbered y * size + x over the whole board, so keys stay
+        valid when the view pans. Sprite slots are ordered by layer, so
+        drawing a cell's keys in order stacks them correctly.
+        """
+        x0, y0, x1, y1 = bounds
+        keys = []
+        layers = ((grid.hideouts, HIDEOUT), (grid.treasures, TREASURE),
+                  (grid.knights, KNIGHT), (grid.hunters, None))
+        for entities, fixed in layers:
+            if not entities:
+                continue
+            count = len(entities)
+            xs = np.fromiter((e.x for e in entities), dtype=np.int64, count=count)
+            ys = np.fromiter((e.y for e in entities), dtype=np.int64, count=count)
+            if fixed is None:
+                sprites = np.fromiter(
+                    (HUNTER + (RESTING if h.in_hideout else CARRYING if h.collected_treasure else 0) +
+                     (PLAYER_OFFSET if h.is_player else 0) for h in entities),
+                    dtype=np.int64, count=count)
+            else:
+                sprites = fixed
+            inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+            keys.append(((ys * grid.size + xs) * SPRITE_COUNT + sprites)[inside])
+        if not keys:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate(keys))
+
+    def _screen_cells(self, cells: np.ndarray):
+        """Screen positions (lists of x and y) of board cells under the current origin."""
+        ys, xs = np.divmod(cells, self.viewport.grid_size)
+        return ((xs - self._origin[0]) * self._cell).tolist(), ((ys - self._origin[1]) * self._cell).tolist()
+
+    def _blits(self, keys: np.ndarray) -> list:
+        """(atlas, dest, area) blit sequence for the given sprite keys."""
+        cells, sprites = np.divmod(keys, SPRITE_COUNT)
+        sx, sy = self._screen_cells(cells)
+        atlas, areas = self.atlas, self.areas
+        return [(atlas, dest, areas[sprite]) for dest, sprite in zip(zip(sx, sy), sprites.tolist())]
+
+    def render(self, grid, turn: int = 0, message: Optional[str] = None) -> int:
+        """Draw one frame; returns the number of dirty rects pushed to the display."""
+        pygame = self.pygame
+        viewport = self.viewport
+        dirty = []
+
+        if viewport.dense:
+            self._render_density(grid, viewport.bounds())
+            self._cell = None
+            dirty.append(self.map_rect)
+        else:
+            # Sprites sit on whole cells, so the view pans a cell at a time
+            cell = max(1, int(round(viewport.zoom)))
+            origin = (int(round(viewport.x)), int(round(viewport.y)))
+            bounds = self._cell_bounds(origin, cell)
+            keys = self._sprite_keys(grid, bounds)
+            surface = self.screen.subsurface(self.map_rect)
+            previous, exposed = self._keys, None
+
+            if cell != self._cell:
+                if self.atlas_zoom != cell:
+                    self.build_atlas(cell)
+                self._build_background(cell)
+                self._cell = cell
+                previous = None
+            elif origin != self._origin:
+                dx = (self._origin[0] - origin[0]) * cell
+                dy = (self._origin[1] - origin[1]) * cell
+                if abs(dx) < self.map_rect.width and abs(dy) < self.map_rect.height:
+                    # Keep what is still on screen and paint only the cells scrolled in
+                    surface.scroll(dx, dy)
+                    old_x0, old_y0, old_x1, old_y1 = self._bounds
+                    x0, y0, x1, y1 = bounds
+                    ys, xs = np.mgrid[y0:y1, x0:x1]
+                    new = ~((xs >= old_x0) & (xs < old_x1) & (ys >= old_y0) & (ys < old_y1))
+                    exposed = (ys * grid.size + xs)[new]
+                else:
+                    previous = None
+            self._origin, self._bounds, self._keys = origin, bounds, keys
+
+            changed = None
+            if previous is not None:
+                changed = np.unique(np.setxor1d(previous, keys, assume_unique=True) // SPRITE_COUNT)
+                ys, xs = np.divmod(changed, grid.size)
+                x0, y0, x1, y1 = bounds
+                changed = changed[(xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)]
+                if exposed is not None:
+                    changed = np.union1d(changed, exposed)
+
+            if changed is None or (exposed is None and 2 * len(changed) > len(keys)):
+                # Most of the sprites changed: repainting everything is cheaper
+                surface.blit(self.background, (0, 0))
+                surface.blits(self._blits(keys), doreturn=False)
+                dirty.append(self.map_rect)
+            elif len(changed):
+                sx, sy = self._screen_cells(changed)
+                areas = [pygame.Rect(x, y, cell, cell) for x, y in zip(sx, sy)]
+                blits = [(self.background, area, area) for area in areas]
+                blits.extend(self._blits(keys[np.isin(keys // SPRITE_COUNT, changed)]))
+                surface.blits(blits, doreturn=False)
+                if exposed is not None:
+                    dirty.append(self.map_rect)  # Everything on screen shifted
+                else:
+                    dirty.extend(area.move(0, HUD_HEIGHT) for area in areas)
+            elif exposed is not None:
+                dirty.append(self.map_rect)
+
+        hud = f"Turn: {turn}   Treasure Collected: {grid.collected_treasure_value:.1f}%"
+        if message:
+            hud += f"   {message}"
+        if hud != self._hud_text:
+            self._hud_text = hud
+            hud_rect = pygame.Rect(0, 0, self.map_rect.width, HUD_HEIGHT)
+            self.screen.fill((0x20, 0x20, 0x20), hud_rect)
+            self.screen.blit(self.font.render(hud, True, (255, 255, 255)), (8, 7))
+            dirty.append(hud_rect)
+
+        if dirty:
+            pygame.display.update(dirty)
+        return len(dirty)
+
+    def _render_density(self, grid, bounds):
+        """Zoomed far out: one pixel per cell, scaled up to whole pixels."""
+        pygame = self.pygame
+        zoom = self.viewport.zoom
+        block = max(1, round(1 / zoom))
+        image = density_image(grid, bounds, block)
+        surface = pygame.image.frombuffer(image.tobytes(), (image.shape[1], image.shape[0]), "RGB")
+        if zoom > 1:
+            scale = int(zoom)
+            surface = pygame.transform.scale(surface, (image.shape[1] * scale, image.shape[0] * scale))
+        x, y = self.viewport.to_screen(bounds[0], bounds[1])
+        self.screen.fill(BACKGROUND, self.map_rect)
+        self.screen.subsurface(self.map_rect).blit(surface, (int(round(x)), int(round(y))))
+
+    def save_frame(self, path: str):
+        self.pygame.image.save(self.screen, path)
+
+    def close(self):
+        self.pygame.display.quit()
+
+
+class PygameSimulation:
+    """
+    Pygame front-end with the same game loop, controls and log lines as
+    EldoriaSimulation: arrow keys move the player, P pauses, R restarts,
+    F toggles following the player, +/- or the wheel zooms, drag pans.
+
+    With frames set, the loop renders that many frames as fast as possible,
+    advancing one turn per frame, and prints the frame rate; combined with
+    headless this is the offscreen benchmark/capture mode.
+    """
+
+    def __init__(self, size=20, seed=None, publish_port=None, connect=None,
+                 headless=False, frames=None, capture_dir=None):
+        from stream import StateClient, StatePublisher
+
+        self.client = None
+        if connect is not None:
+            self.client = StateClient(*connect)
+            self.client.wait_for_keyframe()
+            if not self.client.view.synced:
+                raise SystemExit(f"No game state received from {connect[0]}:{connect[1]}")
+            size = self.client.view.size
+
+        self.game_speed = 500
+        self.turn_count = 0
+        self.paused = False
+        self.grid_size = size
+        self.seed = seed
+        self.publisher = StatePublisher(port=publish_port) if publish_port is not None else None
+        # Reopened on the same port after a restart, since game over closes it
+        self.publish_port = self.publisher.address[1] if self.publisher else None
+        self.game_over = False
+        self.next_turn = 0.0
+        self.renderer = PygameRenderer(size, headless=headless)
+        self.follow_player = size * 30 > MAX_WINDOW
+        self.frames = frames
+        self.capture_dir = capture_dir
+        if capture_dir:
+            os.makedirs(capture_dir, exist_ok=True)
+
+        self.setup_simulation()
+        self.run()
+
+    def setup_simulation(self):
+        from world import build_world
+
+        if self.client:
+            self.grid = self.client.view
+            self.turn_count = self.grid.turn
+            return
+
+        # Hideouts, hunters (the first is the player), knights and treasures
+        self.grid = build_world(self.grid_size, hideouts=3, hunters=3, knights=4,
+                                treasures=15, seed=self.seed)
+        self.turn_count = 0
+        logging.info(f"Seed: {self.grid.rng.seed}")
+        if self.publisher:
+            self.publisher.publish(self.grid, self.turn_count)
+
+    def advance(self) -> bool:
+        """Play one turn; returns False once the game is over."""
+        if self.client:
+            self.client.poll()
+            self.turn_count = self.grid.turn
+            return not self.client.closed
+
+        self.turn_count += 1
+        self.grid.update()
+        if self.publisher:
+            self.publisher.publish(self.grid, self.turn_count)
+
+        logging.info(f"Turn {self.turn_count}: Treasure collected: {self.grid.collected_treasure_value:.1f}%")
+        for i, hunter in enumerate(self.grid.hunters):
+            logging.info(f"Hunter {i + 1} - Stamina: {hunter.stamina:.1f}%")
+        return not self.grid.is_simulation_over()
+
+    def move_player(self, dx, dy):
+        if self.client or self.paused or not self.grid.hunters:
+            return
+        hunter = self.grid.hunters[0]  # Player hunter
+        new_x = (hunter.x + dx) % self.grid.size
+        new_y = (hunter.y + dy) % self.grid.size
+        collided, moved = self.grid.move_player(hunter, dx, dy)
+        if collided:
+            logging.info(f"Hunter {hunter} collided with Knight at ({new_x}, {new_y}), stamina reduced")
+        if moved:
+            logging.info(f"Hunter {hunter} moved to ({hunter.x}, {hunter.y})")
+
+    def handle_event(self, event) -> bool:
+        """Apply one pygame event; returns False when the window is closed."""
+        pygame = self.renderer.pygame
+        viewport = self.renderer.viewport
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN:
+            moves = {pygame.K_UP: (0, -1), pygame.K_DOWN: (0, 1),
+                     pygame.K_LEFT: (-1, 0), pygame.K_RIGHT: (1, 0)}
+            if event.key in moves:
+                self.move_player(*moves[event.key])
+            elif event.key in (pygame.K_p, pygame.K_SPACE):
+                self.paused = not self.paused
+                logging.info(f"Game {'paused' if self.paused else 'resumed'}")
+            elif event.key == pygame.K_r and not self.client:
+                self.restart()
+            elif event.key == pygame.K_f:
+                self.follow_player = not self.follow_player
+            elif event.key in (pygame.K_PLUS, pygame.K_EQUALS, pygame.K_KP_PLUS):
+                viewport.zoom_at(viewport.width / 2, viewport.height / 2, 1.25)
+            elif event.key in (pygame.K_MINUS, pygame.K_KP_MINUS):
+                viewport.zoom_at(viewport.width / 2, viewport.height / 2, 0.8)
+        elif event.type == pygame.MOUSEWHEEL:
+            x, y = pygame.mouse.get_pos()
+            viewport.zoom_at(x, y - HUD_HEIGHT, 1.25 if event.y > 0 else 0.8)
+        elif event.type == pygame.MOUSEMOTION and event.buttons[0]:
+            self.follow_player = False
+            viewport.pan(*event.rel)
+        return True
+
+    def restart(self):
+        """Start a new game, reopening the publisher if game over closed it."""
+        logging.info("Game restarted.")
+        if self.publisher is None and self.publish_port is not None:
+            from stream import StatePublisher
+            self.publisher = StatePublisher(port=self.publish_port)
+        self.setup_simulation()
+        self.game_over = False
+        self.next_turn = time.monotonic() + self.game_speed / 1000
+
+    def run(self):
+        pygame = self.renderer.pygame
+        clock = pygame.time.Clock()
+        running = True
+        self.next_turn = time.monotonic() + self.game_speed / 1000
+        rendered = 0
+        start = time.perf_counter()
+
+        while running:
+            for event in pygame.event.get():
+                running = self.handle_event(event) and running
+
+            if self.frames is not None:
+                turn_due = not self.game_over
+            else:
+                turn_due = not self.game_over and not self.paused and time.monotonic() >= self.next_turn
+            if turn_due:
+                self.game_over = not self.advance()
+                self.next_turn = time.monotonic() + (0.05 if self.client else self.game_speed / 1000)
+                if self.game_over:
+                    logging.info(f"Game Over! Total treasure collected: {self.grid.collected_treasure_value:.1f}%")
+                    self.close_publisher()  # Viewers see the stream end with the game
+            if self.publisher:
+                self.publisher.serve()  # Viewers can attach while paused too
+
+            if self.follow_player and self.grid.hunters:
+                player = self.grid.hunters[0]
+                self.renderer.viewport.center_on(player.x, player.y)
+            message = "Game Over!" if self.game_over else "Paused" if self.paused else None
+            self.renderer.render(self.grid, self.turn_count, message)
+            if self.capture_dir:
+                self.renderer.save_frame(os.path.join(self.capture_dir, f"frame_{rendered:05d}.png"))
+            rendered += 1
+
+            if self.frames is not None:
+                if rendered >= self.frames:
+                    elapsed = time.perf_counter() - start
+                    print(f"Rendered {rendered} frames in {elapsed:.2f}s ({rendered / elapsed:.0f} fps)")
+                    running = False
+            else:
+                clock.tick(60)
+
+        self.renderer.close()
+        self.close_publisher()
+        if self.client:
+            self.client.close()
+
+    def close_publisher(self):
+        if self.publisher:
+            self.publisher.close()
+            self.publisher = None
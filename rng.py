@@ -0,0 +1,109 @@
+from itertools import chain
+from operator import length_hint
+from typing import MutableSequence, Optional, Sequence
+import numpy as np
+
+
+class RandomStream:
+    """
+    Uniform random numbers for one subsystem, pre-drawn from NumPy in blocks.
+
+    random() is the bound __next__ of an iterator over the current block, so
+    each draw is a C-level call with no per-call Python frame.
+    """
+
+    def __init__(self, seed_sequence: np.random.SeedSequence, block_size: int = 4096):
+        self.generator = np.random.default_rng(seed_sequence)
+        self.block_size = block_size
+        self._resume([])
+
+    def _resume(self, pending: list):
+        """Draw the numbers in pending first, then fresh blocks."""
+        self._block = pending
+        self._left = iter(pending)
+        self.random = chain.from_iterable(self._blocks()).__next__
+
+    def _blocks(self):
+        yield self._left
+        while True:
+            self._block = self.generator.random(self.block_size).tolist()
+            self._left = iter(self._block)
+            yield self._left
+
+    def save(self) -> tuple:
+        """Position of the stream, for restore() to rewind to."""
+        # _left is the iterator random() is drawing from, so its length is what is left of the block
+        left = length_hint(self._left)
+        return self.generator.bit_generator.state, self._block[len(self._block) - left:]
+
+    def restore(self, saved: tuple):
+        state, pending = saved
+        self.generator.bit_generator.state = state
+        self._resume(list(pending))
+
+    def __getstate__(self):
+        return self.block_size, self.save()
+
+    def __setstate__(self, state):
+        self.block_size, saved = state
+        self.generator = np.random.default_rng()
+        self.restore(saved)
+
+    def randint(self, a: int, b: int) -> int:
+        """Random integer in [a, b], inclusive like random.randint."""
+        return a + int(self.random() * (b - a + 1))
+
+    def choice(self, seq: Sequence):
+        return seq[int(self.random() * len(seq))]
+
+    def shuffle(self, x: MutableSequence):
+        """In-place Fisher-Yates shuffle."""
+        random = self.random
+        for i in range(len(x) - 1, 0, -1):
+            j = int(random() * (i + 1))
+            x[i], x[j] = x[j], x[i]
+
+
+class GridRandom:
+    """
+    Seeded random streams for a Grid, one per subsystem.
+
+    Each stream is spawned from the same SeedSequence, so draws in one
+    subsystem never shift the numbers seen by another, and any backend that
+    consumes the streams in the same order replays the same game. spawn()
+    derives another set from the same seed under a key, e.g. one set per
+    hunter, so an entity draws the same numbers whichever process steps it.
+    Streams are built on first use.
+    """
+
+    STREAMS = ("movement", "combat", "breeding", "spawning")
+
+    def __init__(self, seed: Optional[int] = None, block_size: int = 4096, key: Sequence[int] = ()):
+        self.key = tuple(key)
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        self.seed = seed  # Pass back as seed to replay a run
+        self.block_size = block_size
+
+    def __getattr__(self, name: str) -> RandomStream:
+        if name not in GridRandom.STREAMS:
+            raise AttributeError(name)
+        # Same child as SeedSequence(seed, spawn_key=key).spawn(len(STREAMS))[index]
+        child = np.random.SeedSequence(self.seed, spawn_key=self.key + (GridRandom.STREAMS.index(name),))
+        stream = RandomStream(child, self.block_size)
+        setattr(self, name, stream)
+        return stream
+
+    def spawn(self, key: Sequence[int], block_size: int = 64) -> "GridRandom":
+        """Streams for one entity. Entities draw little, so their blocks are small."""
+        return GridRandom(self.seed, block_size, self.key + tuple(key))
+
+    def save(self) -> dict:
+        return {name: stream.save() for name, stream in vars(self).items() if name in GridRandom.STREAMS}
+
+    def restore(self, saved: dict):
+        for name in GridRandom.STREAMS:
+            if name in saved:
+                getattr(self, name).restore(saved[name])
+            else:
+                self.__dict__.pop(name, None)  # Not drawn from yet when saved
@@ -0,0 +1,437 @@
+"""
+Binary per-tick state stream for viewers running outside the simulation.
+
+Every frame is a fixed header followed by fixed-size entity records:
+
+    header: frame type (B), turn (I), record count (I), grid size (H),
+            collected treasure value (f)
+    record: change flags (B), kind (B), entity id (I), x (H), y (H),
+            value (f), aux (I)
+
+A record always carries the entity's full current state and its flags say
+what changed, so applying a record is just an overwrite. Delta frames list
+only entities that spawned, changed or disappeared; keyframes list every
+entity and are sent periodically and to each viewer as it attaches.
+"""
+
+import os
+import socket
+import struct
+from typing import Collection, Dict, List, Optional, Tuple
+
+HEADER = struct.Struct("<BIIHf")
+RECORD = struct.Struct("<BBIHHfI")
+
+KEYFRAME, DELTA = 1, 2
+
+HUNTER, KNIGHT, TREASURE, HIDEOUT = 1, 2, 3, 4
+
+# Change flags; several can be set on one record
+MOVED = 1
+VALUE = 2     # Hunter stamina or treasure value
+STATE = 4     # Hunter flags
+SPAWN = 8
+REMOVE = 16
+PICKUP = 32   # Treasure now carried; aux is the carrier's id
+DROP = 64     # Treasure back on the ground
+EXPIRE = 128  # Treasure decayed away (set together with REMOVE)
+
+# Hunter aux bits; the skill index sits in bits 8-15
+PLAYER, IN_HIDEOUT, CARRYING = 1, 2, 4
+SKILLS = ("navigation", "endurance", "stealth")
+
+MAX_BACKLOG = 1 << 22  # Bytes queued for a slow viewer before it is dropped
+
+
+def snapshot(grid, ids: Dict[object, int], next_id) -> Dict[int, Tuple[int, int, int, float, int]]:
+    """Map entity id -> (kind, x, y, value, aux) for everything on the grid."""
+    state = {}
+
+    def eid(entity):
+        entity_id = ids.get(entity)
+        if entity_id is None:
+            entity_id = ids[entity] = next_id()
+        return entity_id
+
+    for hunter in grid.hunters:
+        hunter_id = eid(hunter)
+        flags = ((PLAYER if hunter.is_player else 0) |
+                 (IN_HIDEOUT if hunter.in_hideout else 0) |
+                 (CARRYING if hunter.collected_treasure else 0) |
+                 (SKILLS.index(hunter.skill) << 8 if hunter.skill in SKILLS else 0))
+        state[hunter_id] = (HUNTER, hunter.x, hunter.y, float(hunter.stamina), flags)
+        treasure = hunter.collected_treasure
+        if treasure is not None:
+            state[eid(treasure)] = (TREASURE, hunter.x, hunter.y, float(treasure.value), hunter_id)
+
+    for treasure in grid.treasures:
+        state[eid(treasure)] = (TREASURE, treasure.x, treasure.y, float(treasure.value), 0)
+    for knight in grid.knights:
+        state[eid(knight)] = (KNIGHT, knight.x, knight.y, 0.0, 0)
+    for hideout in grid.hideouts:
+        state[eid(hideout)] = (HIDEOUT, hideout.x, hideout.y, 0.0, 0)
+    return state
+
+
+def diff(previous: Dict[int, tuple], current: Dict[int, tuple], expired: Collection[int] = ()) -> List[tuple]:
+    """
+    Records (flags, kind, id, x, y, value, aux) turning previous into current.
+
+    Removed entities whose ids are in expired are flagged EXPIRE; any other
+    removal (a delivered treasure, a hunter that dropped out) is a plain REMOVE.
+    """
+    records = []
+    for entity_id, (kind, x, y, value, aux) in current.items():
+        before = previous.get(entity_id)
+        if before is None:
+            records.append((SPAWN, kind, entity_id, x, y, value, aux))
+            continue
+        if before[1:] == (x, y, value, aux):
+            continue
+        flags = 0
+        if before[1] != x or before[2] != y:
+            flags |= MOVED
+        if before[3] != value:
+            flags |= VALUE
+        if before[4] != aux:
+            if kind == TREASURE:
+                flags |= PICKUP if aux else DROP
+            else:
+                flags |= STATE
+        records.append((flags, kind, entity_id, x, y, value, aux))
+
+    for entity_id, (kind, x, y, value, aux) in previous.items():
+        if entity_id not in current:
+            flags = REMOVE | (EXPIRE if entity_id in expired else 0)
+            records.append((flags, kind, entity_id, x, y, value, aux))
+    return records
+
+
+def encode(frame_type: int, turn: int, size: int, collected: float, records) -> bytes:
+    parts = [HEADER.pack(frame_type, turn, len(records), size, collected)]
+    parts.extend(RECORD.pack(*record) for record in records)
+    return b"".join(parts)
+
+
+def keyframe_records(state: Dict[int, tuple]) -> List[tuple]:
+    return [(SPAWN, kind, entity_id, x, y, value, aux)
+            for entity_id, (kind, x, y, value, aux) in state.items()]
+
+
+class _Viewer:
+    """
+    One attached viewer: a socket, a pipe or file, or an in-memory stream.
+
+    Sockets and anything with a file descriptor are written without
+    blocking; what they cannot take yet is queued and retried on the next
+    write, and a viewer more than MAX_BACKLOG bytes behind is dropped.
+    """
+
+    def __init__(self, target):
+        self.target = target
+        self.is_socket = isinstance(target, socket.socket)
+        self.fd = None
+        if not self.is_socket:
+            try:
+                fd = target.fileno()
+            except (AttributeError, OSError, ValueError):
+                pass  # No descriptor (e.g. BytesIO); plain writes never block
+            else:
+                target.flush()  # Anything already buffered goes first
+                os.set_blocking(fd, False)
+                self.fd = fd
+        self.pending = bytearray()
+        self.alive = True
+
+    def write(self, data: bytes):
+        self.pending += data
+        try:
+            if self.is_socket:
+                sent = self.target.send(self.pending)
+            elif self.fd is not None:
+                sent = os.write(self.fd, self.pending)
+            else:
+                self.target.write(self.pending)
+                self.target.flush()
+                sent = len(self.pending)
+            del self.pending[:sent]
+        except BlockingIOError:
+            pass
+        except (OSError, ValueError):
+            self.alive = False
+        if len(self.pending) > MAX_BACKLOG:
+            self.alive = False
+
+    def close(self):
+        try:
+            self.target.close()
+        except OSError:
+            pass
+
+
+class StatePublisher:
+    """
+    Publish the grid as a delta stream to any number of viewers.
+
+    Each tick is diffed and encoded once and the same bytes go to every
+    viewer, so extra viewers only cost a socket write. Viewers connect over
+    TCP on localhost; pipes or files can be attached with add_sink().
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, keyframe_interval: int = 50):
+        self.keyframe_interval = keyframe_interval
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind((host, port))
+        self.server.listen()
+        self.server.setblocking(False)
+        self.address = self.server.getsockname()
+
+        self.viewers: List[_Viewer] = []
+        self._new_viewers: List[_Viewer] = []
+        self._ids: Dict[object, int] = {}
+        self._last_id = 0
+        self._state: Dict[int, tuple] = {}
+        self._header: Optional[Tuple[int, int, float]] = None  # (turn, size, collected) last published
+
+    def _next_id(self) -> int:
+        self._last_id += 1
+        return self._last_id
+
+    def add_sink(self, f):
+        """
+        Attach a binary file-like object (e.g. a pipe); it starts with a keyframe.
+
+        A file descriptor behind it is switched to non-blocking, so a slow
+        reader is queued and dropped like a slow socket instead of stalling
+        the game.
+        """
+        self._new_viewers.append(_Viewer(f))
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            conn.setblocking(False)
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._new_viewers.append(_Viewer(conn))
+
+    def publish(self, grid, turn: int):
+        """Send this tick's changes; call once per Grid.update()."""
+        self._accept()
+        current = snapshot(grid, self._ids, self._next_id)
+        expired = set()
+        if self._state.keys() - current.keys():
+            # The grid records why each treasure left; forget entities that left
+            # so their objects can be collected
+            removed = grid.removed_treasures
+            ids = {}
+            for entity, entity_id in self._ids.items():
+                if entity_id in current:
+                    ids[entity] = entity_id
+                elif removed.get(entity) == "expired":
+                    expired.add(entity_id)
+            self._ids = ids
+        records = diff(self._state, current, expired)
+        self._state = current
+
+        self._header = (turn, grid.size, float(grid.collected_treasure_value))
+        periodic = bool(self.keyframe_interval) and turn % self.keyframe_interval == 0
+        keyframe = None
+        if self._new_viewers or periodic:
+            keyframe = encode(KEYFRAME, *self._header, keyframe_records(current))
+
+        if self.viewers:
+            frame = keyframe if periodic else encode(DELTA, *self._header, records)
+            for viewer in self.viewers:
+                viewer.write(frame)
+        self._attach(keyframe)
+
+    def serve(self):
+        """
+        Accept viewers and flush queued bytes between ticks.
+
+        Call this periodically whether or not the game is running: viewers
+        that attach while it is paused or over still get a keyframe of the
+        last published state.
+        """
+        self._accept()
+        if self._header is None:
+            return  # Nothing published yet; new viewers wait for the first tick
+        keyframe = None
+        if self._new_viewers:
+            keyframe = encode(KEYFRAME, *self._header, keyframe_records(self._state))
+        for viewer in self.viewers:
+            if viewer.pending:
+                viewer.write(b"")
+        self._attach(keyframe)
+
+    def _attach(self, keyframe: Optional[bytes]):
+        """Start new viewers with keyframe and drop viewers that failed."""
+        for viewer in self._new_viewers:
+            viewer.write(keyframe)
+            self.viewers.append(viewer)
+        self._new_viewers = []
+
+        for viewer in self.viewers:
+            if not viewer.alive:
+                viewer.close()
+        self.viewers = [viewer for viewer in self.viewers if viewer.alive]
+
+    def close(self):
+        for viewer in self.viewers + self._new_viewers:
+            viewer.close()
+        self.viewers, self._new_viewers = [], []
+        self.server.close()
+
+
+class ViewEntity:
+    """Read-only stand-in for Hunter/Knight/Treasure/Hideout built from records."""
+
+    def __init__(self, kind: int):
+        self.kind = kind
+        self.x = self.y = 0
+        self.value = 0.0
+        self.stamina = 0.0
+        self.skill = None
+        self.is_player = False
+        self.in_hideout = False
+        self.collected_treasure: Optional["ViewEntity"] = None
+        self.carrier = 0
+
+
+class StateView:
+    """
+    Grid-shaped mirror of a published game.
+
+    Exposes size, hunters, knights, treasures, hideouts and
+    collected_treasure_value like Grid, so EldoriaSimulation's draw_*
+    methods can render it unchanged.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self.turn = 0
+        self.collected_treasure_value = 0.0
+        self.knight_hotspots = []
+        self.synced = False
+        self.entities: Dict[int, ViewEntity] = {}
+        self.hunters: List[ViewEntity] = []
+        self.knights: List[ViewEntity] = []
+        self.treasures: List[ViewEntity] = []
+        self.hideouts: List[ViewEntity] = []
+
+    def apply(self, frame_type: int, turn: int, size: int, collected: float, records):
+        if frame_type == KEYFRAME:
+            self.entities = {}
+            self.synced = True
+        elif not self.synced:
+            return  # Deltas mean nothing until the first keyframe
+
+        self.turn, self.size, self.collected_treasure_value = turn, size, collected
+        for flags, kind, entity_id, x, y, value, aux in records:
+            if flags & REMOVE:
+                self.entities.pop(entity_id, None)
+                continue
+            entity = self.entities.get(entity_id)
+            if entity is None:
+                entity = self.entities[entity_id] = ViewEntity(kind)
+            entity.x, entity.y, entity.value = x, y, value
+            if kind == HUNTER:
+                entity.stamina = value
+                entity.is_player = bool(aux & PLAYER)
+                entity.in_hideout = bool(aux & IN_HIDEOUT)
+                skill = (aux >> 8) & 0xFF
+                entity.skill = SKILLS[skill] if skill < len(SKILLS) else None
+            elif kind == TREASURE:
+                entity.carrier = aux
+        self._rebuild()
+
+    def _rebuild(self):
+        by_kind = {HUNTER: [], KNIGHT: [], TREASURE: [], HIDEOUT: []}
+        for entity in self.entities.values():
+            by_kind[entity.kind].append(entity)
+        for hunter in by_kind[HUNTER]:
+            hunter.collected_treasure = None
+        treasures = []
+        for treasure in by_kind[TREASURE]:
+            carrier = self.entities.get(treasure.carrier) if treasure.carrier else None
+            if carrier is not None:
+                carrier.collected_treasure = treasure
+            else:
+                treasures.append(treasure)
+        self.hunters = by_kind[HUNTER]
+        self.knights = by_kind[KNIGHT]
+        self.treasures = treasures
+        self.hideouts = by_kind[HIDEOUT]
+
+
+def decode_frames(buffer: bytearray):
+    """Pop every complete frame off the front of buffer."""
+    frames = []
+    offset = 0
+    while len(buffer) - offset >= HEADER.size:
+        frame_type, turn, count, size, collected = HEADER.unpack_from(buffer, offset)
+        end = offset + HEADER.size + count * RECORD.size
+        if end > len(buffer):
+            break
+        records = list(RECORD.iter_unpack(bytes(buffer[offset + HEADER.size:end])))
+        frames.append((frame_type, turn, size, collected, records))
+        offset = end
+    del buffer[:offset]
+    return frames
+
+
+class StateClient:
+    """Non-blocking subscriber that keeps a StateView up to date."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, timeout: float = 5.0):
+        self.timeout = timeout
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.view = StateView()
+        self._buffer = bytearray()
+        self.closed = False
+
+    def wait_for_keyframe(self):
+        """
+        Block until the view holds a full game state.
+
+        Gives up, leaving the client closed and the view unsynced, if the
+        publisher sends nothing for the connect timeout or drops the
+        connection.
+        """
+        while not self.view.synced and not self.closed:
+            self._receive(blocking=True)
+
+    def poll(self) -> int:
+        """Apply whatever frames have arrived; returns how many were applied."""
+        return self._receive(blocking=False)
+
+    def _receive(self, blocking: bool) -> int:
+        if blocking:
+            self.sock.settimeout(self.timeout)
+        else:
+            self.sock.setblocking(False)
+        try:
+            while True:
+                chunk = self.sock.recv(1 << 16)
+                if not chunk:
+                    self.closed = True
+                    break
+                self._buffer += chunk
+                if blocking:
+                    break
+        except (BlockingIOError, InterruptedError):
+            pass
+        except OSError:  # Includes socket.timeout and a reset connection
+            self.closed = True
+        frames = decode_frames(self._buffer)
+        for frame in frames:
+            self.view.apply(*frame)
+        return len(frames)
+
+    def close(self):
+        self.sock.close()
@@ -1,4 +1,8 @@
+import os
+import tempfile
+import time
 import unittest
+import unittest.mock
 import numpy as np
 from hunter import Hunter
 from treasure import Treasure
@@ -6,6 +10,14 @@ from knight import Knight
 from grid import Grid
 from hideout import Hideout
 from a_star import a_star
+from kmeans import kmeans
+from environment import EldoriaEnv
+from rng import GridRandom
+from world import build_world
+import log_analysis
+import stream
+from viewport import Viewport, density_image
+from pygame_renderer import PygameRenderer, SPRITE_COUNT
 
 
 class TestHunter(unittest.TestCase):
@@ -127,6 +139,10 @@ class TestAStar(unittest.TestCase):
         path = a_star((0, 0), (4, 0), grid, avoid_knights=True)
         self.assertTrue(all((x, y) != (1, 0) for x, y in path))
 
+    def test_path_wraps_around_the_edge(self):
+        self.assertEqual(a_star((0, 0), (4, 0), Grid(5)), [(4, 0)])
+        self.assertEqual(a_star((1, 0), (1, 4), Grid(5)), [(1, 4)])
+
     def test_path_avoids_hotspots(self):
         grid = Grid(5)
         grid.knight_hotspots = [(2, 2)]
@@ -148,5 +164,551 @@ class TestMLIntegration(unittest.TestCase):
         self.assertTrue(all(0 <= x < 5 and 0 <= y < 5 for (x, y) in self.grid.knight_hotspots))
 
 
+class TestKMeans(unittest.TestCase):
+    def histories(self):
+        grid = build_world(20, hideouts=3, hunters=3, knights=4, treasures=15, seed=3)
+        for _ in range(60):
+            grid.update()
+            yield grid.knight_positions_history[-50:]
+        yield [(2, 2)] * 12  # Every cluster but one ends up empty
+        yield [(0, 0)] * 6 + [(9, 9)] * 6
+
+    def test_matches_scikit_learn(self):
+        from sklearn.cluster import KMeans
+
+        for data in self.histories():
+            k = min(3, len(data))
+            expected = KMeans(n_clusters=k, random_state=42).fit(data).cluster_centers_
+            np.testing.assert_array_equal(kmeans(data, k, seed=42), expected)
+
+
+class TestEnvironment(unittest.TestCase):
+    def test_reset_observation_shape(self):
+        env = EldoriaEnv(size=10)
+        obs = env.reset(seed=1)
+        self.assertEqual(obs.shape, (len(EldoriaEnv.CHANNELS), 10, 10))
+        self.assertEqual(obs[0].sum(), 1.0)
+        self.assertEqual(obs[2].sum(), 4.0)
+
+    def test_step_reuses_observation_buffer(self):
+        env = EldoriaEnv(size=10)
+        obs = env.reset(seed=1)
+        next_obs, _, _, _ = env.step(4)
+        self.assertIs(next_obs, obs)
+
+    def test_reward_is_collected_value_delta(self):
+        env = EldoriaEnv(size=10)
+        env.reset(seed=1)
+        before = env.grid.collected_treasure_value
+        _, reward, _, info = env.step(0)
+        self.assertAlmostEqual(reward, info["collected_treasure_value"] - before)
+
+    def test_same_seed_same_game(self):
+        first, second = EldoriaEnv(size=10), EldoriaEnv(size=10)
+        first.reset(seed=7)
+        second.reset(seed=7)
+        for i in range(50):
+            obs_a, reward_a, done_a, _ = first.step(i % 5)
+            obs_b, reward_b, done_b, _ = second.step(i % 5)
+            np.testing.assert_array_equal(obs_a, obs_b)
+            self.assertEqual((reward_a, done_a), (reward_b, done_b))
+            if done_a:
+                break
+
+
+class TestRandomStreams(unittest.TestCase):
+    def test_streams_are_independent(self):
+        a, b = GridRandom(3), GridRandom(3)
+        for _ in range(10):
+            a.combat.random()
+        self.assertEqual([a.movement.random() for _ in range(5)],
+                         [b.movement.random() for _ in range(5)])
+
+    def test_randint_is_inclusive(self):
+        stream = GridRandom(0).spawning
+        draws = {stream.randint(0, 2) for _ in range(500)}
+        self.assertEqual(draws, {0, 1, 2})
+
+    def test_shuffle_keeps_elements(self):
+        items = list(range(10))
+        GridRandom(0).movement.shuffle(items)
+        self.assertEqual(sorted(items), list(range(10)))
+
+    def test_restore_rewinds_a_stream(self):
+        rng = GridRandom(0).spawn((4, 0))
+        rng.movement.random()
+        saved = rng.save()
+        draws = [rng.movement.random() for _ in range(100)] + [rng.combat.random()]
+        rng.restore(saved)
+        self.assertEqual([rng.movement.random() for _ in range(100)] + [rng.combat.random()], draws)
+
+    def test_spawned_streams_do_not_depend_on_other_entities(self):
+        a, b = GridRandom(5), GridRandom(5)
+        for _ in range(10):
+            a.spawn((4, 1)).movement.random()
+        self.assertEqual(a.spawn((4, 2)).movement.random(), b.spawn((4, 2)).movement.random())
+        self.assertNotEqual(a.spawn((4, 2)).movement.random(), a.spawn((4, 3)).movement.random())
+
+
+class TestWorldBuilder(unittest.TestCase):
+    def test_entities_get_distinct_cells(self):
+        grid = build_world(6, hideouts=3, hunters=10, knights=8, treasures=15, seed=1)
+        cells = [(e.x, e.y) for e in grid.hideouts + grid.hunters + grid.knights + grid.treasures]
+        self.assertEqual(len(cells), 36)
+        self.assertEqual(len(set(cells)), 36)
+        self.assertTrue(grid.hunters[0].is_player)
+
+    def test_same_seed_same_world(self):
+        first = build_world(30, seed=5)
+        second = build_world(30, seed=5)
+        self.assertEqual([(k.x, k.y) for k in first.knights], [(k.x, k.y) for k in second.knights])
+        self.assertEqual([t.value for t in first.treasures], [t.value for t in second.treasures])
+
+    def test_treasure_values_keep_their_type(self):
+        grid = build_world(20, treasures=30, seed=2)
+        self.assertTrue(all(type(t.value) is int and t.value in (3, 7, 13) for t in grid.treasures))
+        grid = build_world(20, treasures=30, seed=2, treasure_values=(2.5,))
+        self.assertEqual({t.value for t in grid.treasures}, {2.5})
+
+    def test_density_map_limits_spawns(self):
+        density = np.zeros((10, 10))
+        density[:, :2] = 1.0
+        grid = build_world(10, hideouts=0, hunters=0, knights=12, treasures=0, seed=3,
+                           density={"knights": density})
+        self.assertTrue(all(k.x < 2 for k in grid.knights))
+
+    def test_overfull_world_raises(self):
+        with self.assertRaises(ValueError):
+            build_world(3, hideouts=0, hunters=5, knights=5, treasures=0, seed=0)
+
+    def test_random_empty_cell_on_crowded_grid(self):
+        grid = Grid(4, seed=0)
+        for x in range(4):
+            for y in range(4):
+                if (x, y) != (2, 3):
+                    grid.add_knight(Knight(x, y))
+        self.assertEqual(grid.random_empty_cell(), (2, 3))
+        grid.add_knight(Knight(2, 3))
+        with self.assertRaises(ValueError):
+            grid.random_empty_cell()
+
+
+class TestLogAnalysis(unittest.TestCase):
+    LOG = (
+        "2025-05-06 14:33:18,995 - Turn 1: Treasure collected: 0.0%\n"
+        "2025-05-06 14:33:18,995 - Hunter 1 - Stamina: 100.0%\n"
+        "2025-05-06 14:33:18,996 - Hunter 2 - Stamina: 8.5%\n"
+        "2025-05-06 14:33:19,100 - Hunter <hunter.Hunter object at 0x01> moved to (1, 14)\n"
+        "2025-05-06 14:33:19,200 - Hunter <hunter.Hunter object at 0x01> collided with Knight at (1, 13), stamina reduced\n"
+        "2025-05-06 14:33:19,504 - Turn 2: Treasure collected: 13.0%\n"
+        "2025-05-06 14:33:19,504 - Hunter 1 - Stamina: 80.0%\n"
+        "2025-05-06 14:33:20,000 - Game paused\n"
+        "2025-05-06 14:40:00,000 - Turn 1: Treasure collected: 0.0%\n"
+        "2025-05-06 14:40:00,000 - Hunter 1 - Stamina: 0.0%\n"
+    )
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".txt")
+        with os.fdopen(fd, "w") as f:
+            f.write(self.LOG)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def collect(self, chunk_size=log_analysis.CHUNK_SIZE):
+        blocks = list(log_analysis.iter_turns(self.path, chunk_size))
+        return {name: np.concatenate([b[name] for b in blocks]) for name in log_analysis.COLUMNS}
+
+    def test_turn_aggregates(self):
+        turns = self.collect()
+        np.testing.assert_array_equal(turns["game"], [0, 0, 1])
+        np.testing.assert_array_equal(turns["turn"], [1, 2, 1])
+        np.testing.assert_allclose(turns["treasure_collected"], [0.0, 13.0, 0.0])
+        np.testing.assert_allclose(turns["treasure_delta"], [0.0, 13.0, 0.0])
+        np.testing.assert_array_equal(turns["hunters"], [2, 1, 1])
+        np.testing.assert_allclose(turns["stamina_mean"], [54.25, 80.0, 0.0])
+        np.testing.assert_allclose(turns["stamina_min"], [8.5, 80.0, 0.0])
+        np.testing.assert_array_equal(turns["hunters_down"], [0, 0, 1])
+        np.testing.assert_array_equal(turns["collisions"], [1, 0, 0])
+        np.testing.assert_array_equal(turns["moves"], [1, 0, 0])
+        np.testing.assert_array_equal(turns["stamina_90"], [1, 0, 0])
+        self.assertAlmostEqual(turns["turn_seconds"][1], 0.509, places=3)
+        self.assertTrue(np.isnan(turns["turn_seconds"][2]))
+
+    def test_chunking_does_not_change_results(self):
+        whole = self.collect()
+        for chunk_size in (40, 97, 200):
+            chunked = self.collect(chunk_size)
+            for name in log_analysis.COLUMNS:
+                np.testing.assert_array_equal(whole[name], chunked[name])
+
+    def test_long_turn_numbers(self):
+        with open(self.path, "w") as f:
+            f.write("2025-05-06 14:33:18,995 - Turn 123456: Treasure collected: 0.0%\n")
+        np.testing.assert_array_equal(self.collect()["turn"], [123456])
+
+    def test_csv_output(self):
+        out = self.path + ".csv"
+        try:
+            count = log_analysis.write_csv(log_analysis.iter_turns(self.path), out)
+            with open(out) as f:
+                lines = f.read().splitlines()
+        finally:
+            os.remove(out)
+        self.assertEqual(count, 3)
+        self.assertEqual(lines[0].split(","), list(log_analysis.COLUMNS))
+        self.assertEqual(len(lines), 4)
+
+    def test_npz_output(self):
+        out = self.path + ".npz"
+        try:
+            count = log_analysis.write_npz(log_analysis.iter_turns(self.path, 97), out)
+            with np.load(out) as archive:
+                written = {name: archive[name] for name in archive.files}
+            empty = log_analysis.write_npz(iter(()), out)
+            with np.load(out) as archive:
+                self.assertEqual(archive["turn"].shape, (0,))
+        finally:
+            os.remove(out)
+        self.assertEqual(count, 3)
+        self.assertEqual(empty, 0)
+        self.assertEqual(sorted(written), sorted(log_analysis.COLUMNS))
+        for name, values in self.collect().items():
+            self.assertEqual(written[name].dtype, values.dtype)
+            np.testing.assert_array_equal(written[name], values)
+
+
+class TestStateStream(unittest.TestCase):
+    def mirror_matches(self, view, grid):
+        def hunters(g):
+            return [(h.x, h.y, round(h.stamina, 3), h.in_hideout, h.collected_treasure is not None)
+                    for h in g.hunters]
+        self.assertEqual(hunters(view), hunters(grid))
+        self.assertEqual(sorted((t.x, t.y, round(t.value, 3)) for t in view.treasures),
+                         sorted((t.x, t.y, round(t.value, 3)) for t in grid.treasures))
+        self.assertEqual(sorted((k.x, k.y) for k in view.knights), sorted((k.x, k.y) for k in grid.knights))
+
+    def test_deltas_rebuild_the_grid(self):
+        env = EldoriaEnv(size=12)
+        env.reset(seed=2)
+        ids, counter = {}, iter(range(1, 10 ** 6))
+        state = stream.snapshot(env.grid, ids, lambda: next(counter))
+        view = stream.StateView()
+        buffer = bytearray(stream.encode(stream.KEYFRAME, 0, 12, 0.0, stream.keyframe_records(state)))
+        for turn in range(1, 40):
+            _, _, done, _ = env.step(turn % 5)
+            current = stream.snapshot(env.grid, ids, lambda: next(counter))
+            buffer += stream.encode(stream.DELTA, turn, 12, env.grid.collected_treasure_value,
+                                    stream.diff(state, current))
+            state = current
+            if done:
+                break
+        for frame in stream.decode_frames(buffer):
+            view.apply(*frame)
+        self.assertEqual(len(buffer), 0)
+        self.mirror_matches(view, env.grid)
+
+    def published_flags(self, grid, change):
+        """Flags by entity of the delta a publisher sends for change(grid)."""
+        read_fd, write_fd = os.pipe()
+        publisher = stream.StatePublisher(keyframe_interval=0)
+        try:
+            publisher.add_sink(os.fdopen(write_fd, "wb"))
+            publisher.publish(grid, 1)
+            ids = dict(publisher._ids)
+            change(grid)
+            publisher.publish(grid, 2)
+            frames = stream.decode_frames(bytearray(os.read(read_fd, 1 << 16)))
+        finally:
+            publisher.close()
+            os.close(read_fd)
+        self.assertEqual([frame[0] for frame in frames], [stream.KEYFRAME, stream.DELTA])
+        flags = {record[2]: record[0] for record in frames[1][4]}
+        return {entity: flags.get(entity_id, 0) for entity, entity_id in ids.items()}
+
+    def test_pickup_and_expire_flags(self):
+        grid = Grid(5, seed=0)
+        hunter = Hunter(0, 0, "endurance")
+        treasure = Treasure(1, 0, 7)
+        stale = Treasure(3, 3, 0.1)
+        grid.add_hunter(hunter)
+        grid.add_treasure(treasure)
+        grid.add_treasure(stale)
+
+        def pick_up_and_decay(grid):
+            hunter.x = 1
+            hunter.collect_treasure(grid)
+            grid.decay_treasures(grid.treasures)
+
+        flags = self.published_flags(grid, pick_up_and_decay)
+        self.assertTrue(flags[treasure] & stream.PICKUP)
+        self.assertEqual(flags[stale], stream.REMOVE | stream.EXPIRE)
+        self.assertEqual(grid.removed_treasures, {stale: "expired"})
+
+    def test_treasure_delivered_from_a_hideout_cell_is_not_expired(self):
+        grid = Grid(5, seed=0)
+        grid.add_hideout(Hideout(1, 0))
+        treasure = Treasure(1, 0, 0.1)  # One decay step from expiring, but delivered
+        grid.add_treasure(treasure)
+        hunter = Hunter(0, 0, "endurance")
+        grid.add_hunter(hunter)
+
+        def deliver(grid):
+            hunter.x = 1
+            hunter.collect_treasure(grid)
+            grid.deliver_treasure(hunter)
+
+        self.assertEqual(self.published_flags(grid, deliver)[treasure], stream.REMOVE)
+        self.assertEqual(grid.removed_treasures, {treasure: "delivered"})
+
+    def test_pipe_sink_does_not_block_the_publisher(self):
+        grid = build_world(40, hunters=30, knights=30, treasures=100, seed=1)
+        read_fd, write_fd = os.pipe()
+        os.set_blocking(read_fd, False)
+        publisher = stream.StatePublisher(keyframe_interval=1)
+
+        def drain():
+            try:
+                return os.read(read_fd, 1 << 16)
+            except BlockingIOError:
+                return b""
+
+        try:
+            publisher.add_sink(os.fdopen(write_fd, "wb"))
+            # Keyframes of a few KB each soon fill the pipe, which nobody reads yet
+            for turn in range(1, 1000):
+                publisher.publish(grid, turn)
+                if publisher.viewers[0].pending:
+                    break
+            self.assertTrue(publisher.viewers[0].pending)
+
+            received = bytearray()
+            while publisher.viewers[0].pending:
+                received += drain()
+                publisher.serve()
+            received += drain()
+            self.assertEqual([frame[1] for frame in stream.decode_frames(received)],
+                             list(range(1, turn + 1)))
+
+            with unittest.mock.patch.object(stream, "MAX_BACKLOG", 1 << 16):
+                for turn in range(turn + 1, turn + 1000):
+                    publisher.publish(grid, turn)
+                    if not publisher.viewers:
+                        break
+            self.assertEqual(publisher.viewers, [])  # Too far behind, so dropped
+        finally:
+            publisher.close()
+            os.close(read_fd)
+
+    def test_viewer_attaches_mid_game(self):
+        env = EldoriaEnv(size=12)
+        env.reset(seed=4)
+        publisher = stream.StatePublisher(keyframe_interval=0)
+        client = None
+        try:
+            for turn in range(1, 15):
+                env.step(turn % 5)
+                if turn == 5:
+                    client = stream.StateClient(*publisher.address)
+                publisher.publish(env.grid, turn)
+            client.wait_for_keyframe()
+            deadline = time.monotonic() + 5
+            while client.view.turn < 14 and time.monotonic() < deadline:
+                client.poll()
+            self.mirror_matches(client.view, env.grid)
+        finally:
+            if client:
+                client.close()
+            publisher.close()
+
+    def test_viewer_attaches_while_paused(self):
+        env = EldoriaEnv(size=12)
+        env.reset(seed=4)
+        publisher = stream.StatePublisher()
+        client = None
+        try:
+            publisher.publish(env.grid, 0)
+            client = stream.StateClient(*publisher.address)
+            deadline = time.monotonic() + 5
+            while not publisher.viewers and time.monotonic() < deadline:
+                publisher.serve()  # No ticks are published while paused
+            client.wait_for_keyframe()
+            self.assertTrue(client.view.synced)
+            self.mirror_matches(client.view, env.grid)
+        finally:
+            if client:
+                client.close()
+            publisher.close()
+
+    def test_client_gives_up_without_a_keyframe(self):
+        publisher = stream.StatePublisher()
+        client = stream.StateClient(*publisher.address, timeout=0.2)
+        try:
+            client.wait_for_keyframe()
+            self.assertTrue(client.closed)
+            self.assertFalse(client.view.synced)
+        finally:
+            client.close()
+            publisher.close()
+
+
+class TestViewport(unittest.TestCase):
+    def test_bounds_follow_zoom_and_pan(self):
+        view = Viewport(500, 600, 600, zoom=30)
+        self.assertEqual(view.bounds(), (0, 0, 20, 20))
+        view.center_on(250, 250)
+        x0, y0, x1, y1 = view.bounds()
+        self.assertTrue(x0 <= 250 < x1 and y0 <= 250 < y1)
+        self.assertLessEqual(x1 - x0, 21)  # 20 cells, partially covering one more
+
+    def test_zoom_keeps_point_under_cursor(self):
+        view = Viewport(100, 600, 600, zoom=30)
+        view.center_on(50, 50)
+        before = view.to_cell(120, 80)
+        view.zoom_at(120, 80, 1.25)
+        after = view.to_cell(120, 80)
+        self.assertAlmostEqual(before[0], after[0])
+        self.assertAlmostEqual(before[1], after[1])
+
+    def test_zoomed_out_switches_to_whole_map_density(self):
+        for size, min_zoom in ((500, 1.0), (1000, 0.5)):
+            view = Viewport(size, 600, 600, zoom=30)
+            for _ in range(40):
+                view.zoom_at(0, 0, 0.8)
+            self.assertTrue(view.dense)
+            self.assertEqual(view.zoom, min_zoom)
+            self.assertEqual(view.bounds(), (0, 0, size, size))
+
+    def test_zooms_back_in_from_whole_map(self):
+        view = Viewport(1000, 600, 600, zoom=30)
+        for _ in range(40):
+            view.zoom_at(300, 300, 0.8)
+        zooms = []
+        for _ in range(40):
+            view.zoom_at(300, 300, 1.25)
+            zooms.append(view.zoom)
+        self.assertEqual(zooms[:3], [1.0, 2.0, 3.0])
+        self.assertFalse(view.dense)
+        self.assertEqual(view.zoom, view.max_zoom)
+
+    def test_density_image_layers(self):
+        grid = Grid(10, seed=0)
+        grid.add_hideout(Hideout(2, 3))
+        grid.add_knight(Knight(5, 5))
+        grid.add_hunter(Hunter(5, 5, "stealth"))
+        image = density_image(grid, (0, 0, 10, 10))
+        self.assertEqual(image.shape, (10, 10, 3))
+        self.assertEqual(tuple(image[3, 2]), (0x4C, 0xAF, 0x50))
+        self.assertEqual(tuple(image[5, 5]), (0x21, 0x96, 0xF3))  # Hunter drawn over knight
+        self.assertEqual(tuple(image[0, 0]), (0xFF, 0xFF, 0xFF))
+        self.assertEqual(density_image(grid, (0, 0, 10, 10), block=4).shape, (3, 3, 3))
+
+
+class TestPygameRenderer(unittest.TestCase):
+    def setUp(self):
+        self.grid = build_world(20, seed=3)
+        self.renderer = PygameRenderer(20, headless=True)
+
+    def tearDown(self):
+        self.renderer.close()
+
+    def pixels(self):
+        return self.renderer.pygame.surfarray.array3d(self.renderer.screen).copy()
+
+    def full_render(self, grid, turn):
+        """Pixels of a from-scratch render at the same view; closes the display."""
+        view = self.renderer.viewport
+        fresh = PygameRenderer(grid.size, headless=True)
+        fresh.viewport.zoom, fresh.viewport.x, fresh.viewport.y = view.zoom, view.x, view.y
+        try:
+            fresh.render(grid, turn)
+            return fresh.pygame.surfarray.array3d(fresh.screen).copy()
+        finally:
+            fresh.close()
+
+    def test_atlas_has_a_slot_per_sprite(self):
+        self.renderer.build_atlas(24)
+        self.assertEqual(self.renderer.atlas.get_size(), (24 * SPRITE_COUNT, 24))
+
+    def test_only_changed_cells_are_redrawn(self):
+        self.renderer.render(self.grid, 0)
+        self.assertEqual(self.renderer.render(self.grid, 0), 0)
+        knight = self.grid.knights[0]
+        knight.x = (knight.x + 1) % self.grid.size
+        self.assertLessEqual(self.renderer.render(self.grid, 0), 2)
+
+        drawn = self.pixels()
+        self.assertTrue(np.array_equal(drawn, self.full_render(self.grid, 0)))
+        self.assertFalse(np.array_equal(drawn, self.full_render(Grid(20), 0)))
+
+    def test_following_scrolls_instead_of_repainting(self):
+        grid = build_world(60, hunters=20, knights=20, treasures=60, seed=3)
+        self.renderer.close()
+        self.renderer = PygameRenderer(60, headless=True)
+        player = grid.hunters[0]
+        self.renderer.viewport.center_on(player.x, player.y)
+        self.renderer.render(grid, 0)
+        background = self.renderer.background
+
+        player.x = (player.x + 1) % grid.size
+        player.y = (player.y + 1) % grid.size
+        self.renderer.viewport.center_on(player.x, player.y)
+        self.renderer.render(grid, 0)
+        self.assertIs(self.renderer.background, background)
+        self.assertTrue(np.array_equal(self.pixels(), self.full_render(grid, 0)))
+
+    def test_zooms_out_to_density_and_back(self):
+        grid = build_world(500, hunters=50, knights=50, treasures=200, seed=3)
+        self.renderer.close()
+        self.renderer = PygameRenderer(500, headless=True)
+        view = self.renderer.viewport
+        for _ in range(40):
+            view.zoom_at(view.width / 2, view.height / 2, 0.8)
+            self.renderer.render(grid, 0)
+        self.assertEqual(view.bounds(), (0, 0, 500, 500))
+        for _ in range(20):
+            view.zoom_at(view.width / 2, view.height / 2, 1.25)
+            self.renderer.render(grid, 0)
+        self.assertFalse(view.dense)
+        self.assertTrue(np.array_equal(self.pixels(), self.full_render(grid, 0)))
+
+    def test_renders_a_state_view(self):
+        ids, counter = {}, iter(range(1, 10 ** 6))
+        state = stream.snapshot(self.grid, ids, lambda: next(counter))
+        view = stream.StateView()
+        buffer = bytearray(stream.encode(stream.KEYFRAME, 1, 20, 0.0, stream.keyframe_records(state)))
+        for frame in stream.decode_frames(buffer):
+            view.apply(*frame)
+
+        self.renderer.render(self.grid, 1)
+        self.assertTrue(np.array_equal(self.pixels(), self.full_render(view, 1)))
+
+    def test_restart_after_game_over(self):
+        from pygame_renderer import PygameSimulation
+        pygame = self.renderer.pygame
+        played = []
+
+        class Scripted(PygameSimulation):
+            games = 0
+
+            def setup_simulation(self):
+                super().setup_simulation()
+                self.games += 1
+                if self.games == 1:
+                    self.grid.treasures.clear()  # Over after the first turn
+
+            def advance(self):
+                port = self.publisher.address[1] if self.publisher else None
+                playing = super().advance()
+                played.append((self.games, self.turn_count, port))
+                if not playing:
+                    pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_r))
+                return playing
+
+        sim = Scripted(seed=3, publish_port=0, headless=True, frames=6)
+        port = sim.publish_port
+        self.assertEqual(played, [(1, 1, port)] + [(2, turn, port) for turn in range(1, 6)])
+
+
 if __name__ == '__main__':
     unittest.main()
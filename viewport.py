@@ -0,0 +1,122 @@
+import math
+from typing import Tuple
+import numpy as np
+
+# Layers of the density image, later layers drawn over earlier ones
+DENSITY_LAYERS = (
+    ("hideouts", (0x4C, 0xAF, 0x50)),
+    ("treasures", (0xFF, 0xD7, 0x00)),
+    ("knights", (0xF4, 0x43, 0x36)),
+    ("hunters", (0x21, 0x96, 0xF3)),
+)
+BACKGROUND = (0xFF, 0xFF, 0xFF)
+
+
+class Viewport:
+    """
+    Scrollable, zoomable window onto the grid, in screen pixels.
+
+    x and y are the cell coordinates of the top-left screen corner and zoom
+    is the size of one cell in pixels. Below density_zoom the renderer is
+    expected to switch to density_image(); there the zoom snaps to whole
+    pixels per cell (or whole cells per pixel) so the image lines up exactly.
+    """
+
+    def __init__(self, grid_size: int, width: int, height: int, zoom: float = 30.0,
+                 max_zoom: float = 60.0, density_zoom: float = 6.0):
+        self.grid_size = grid_size
+        self.width = width
+        self.height = height
+        self.max_zoom = max_zoom
+        self.density_zoom = density_zoom
+        # Fully zoomed out, the whole map fits on screen
+        fit = min(width, height) / grid_size
+        if fit < density_zoom:
+            fit = float(math.floor(fit)) if fit >= 1 else 1.0 / math.ceil(1.0 / fit)
+        self.min_zoom = min(zoom, fit)
+        self.zoom = zoom
+        self.x = 0.0
+        self.y = 0.0
+        self.clamp()
+
+    @property
+    def dense(self) -> bool:
+        return self.zoom < self.density_zoom
+
+    def bounds(self) -> Tuple[int, int, int, int]:
+        """Visible cells as (x0, y0, x1, y1), end-exclusive and clipped to the grid."""
+        x0 = max(0, int(self.x))
+        y0 = max(0, int(self.y))
+        x1 = min(self.grid_size, int(math.ceil(self.x + self.width / self.zoom)))
+        y1 = min(self.grid_size, int(math.ceil(self.y + self.height / self.zoom)))
+        return x0, y0, x1, y1
+
+    def to_screen(self, x: float, y: float) -> Tuple[float, float]:
+        """Screen position of the top-left corner of cell (x, y)."""
+        return (x - self.x) * self.zoom, (y - self.y) * self.zoom
+
+    def to_cell(self, px: float, py: float) -> Tuple[float, float]:
+        return self.x + px / self.zoom, self.y + py / self.zoom
+
+    def zoom_at(self, px: float, py: float, factor: float):
+        """Zoom by factor, keeping the cell under screen point (px, py) in place."""
+        cx, cy = self.to_cell(px, py)
+        zoom = min(self.max_zoom, max(self.min_zoom, self.zoom * factor))
+        if zoom < self.density_zoom:
+            # Snap to the next whole step in the zoom direction; rounding to
+            # the nearest one would undo small factors like 1.25 and 0.8
+            zoom_in = factor > 1
+            if zoom >= 1:
+                zoom = float(math.ceil(zoom) if zoom_in else math.floor(zoom))
+            else:
+                zoom = 1.0 / (math.floor(1.0 / zoom) if zoom_in else math.ceil(1.0 / zoom))
+            zoom = max(zoom, self.min_zoom)
+        self.zoom = zoom
+        self.x = cx - px / zoom
+        self.y = cy - py / zoom
+        self.clamp()
+
+    def pan(self, dpx: float, dpy: float):
+        """Drag the map by a screen-pixel offset."""
+        self.x -= dpx / self.zoom
+        self.y -= dpy / self.zoom
+        self.clamp()
+
+    def center_on(self, x: float, y: float):
+        self.x = x + 0.5 - self.width / self.zoom / 2
+        self.y = y + 0.5 - self.height / self.zoom / 2
+        self.clamp()
+
+    def clamp(self):
+        self.x = min(max(0.0, self.x), max(0.0, self.grid_size - self.width / self.zoom))
+        self.y = min(max(0.0, self.y), max(0.0, self.grid_size - self.height / self.zoom))
+
+
+def density_image(grid, bounds: Tuple[int, int, int, int], block: int = 1) -> np.ndarray:
+    """
+    RGB image of the cells in bounds, one pixel per block x block cells.
+
+    Each pixel takes the colour of the top-most entity layer present in its
+    cells, so nothing disappears when zoomed far out.
+    """
+    x0, y0, x1, y1 = bounds
+    height = max(0, -(-(y1 - y0) // block))
+    width = max(0, -(-(x1 - x0) // block))
+    image = np.empty((height, width, 3), dtype=np.uint8)
+    image[:] = BACKGROUND
+
+    for layer, colour in DENSITY_LAYERS:
+        entities = getattr(grid, layer)
+        if not entities:
+            continue
+        xs = np.fromiter((e.x for e in entities), dtype=np.int64, count=len(entities))
+        ys = np.fromiter((e.y for e in entities), dtype=np.int64, count=len(entities))
+        inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+        image[(ys[inside] - y0) // block, (xs[inside] - x0) // block] = colour
+    return image
+
+
+def ppm_bytes(image: np.ndarray) -> bytes:
+    """Binary PPM encoding of an RGB image, as accepted by tk.PhotoImage(data=...)."""
+    height, width = image.shape[:2]
+    return b"P6 %d %d 255\n" % (width, height) + image.tobytes()
@@ -0,0 +1,83 @@
+from typing import Dict, Optional, Sequence
+import numpy as np
+from grid import Grid
+from hunter import Hunter
+from knight import Knight
+from hideout import Hideout
+from treasure import Treasure
+
+SKILLS = ("navigation", "endurance", "stealth")
+
+
+def sample_cells(generator: np.random.Generator, free: np.ndarray, count: int,
+                 weights: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Draw count distinct flat cell indices where free is True, without replacement.
+
+    Weighted draws use exponential keys (Efraimidis-Spirakis): the count
+    smallest of Exp(1) / weight form a weighted sample without replacement,
+    found with one argpartition instead of a loop over the board.
+    """
+    if count <= 0:
+        return np.empty(0, dtype=np.int64)
+
+    keys = generator.exponential(size=free.size)
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64).ravel()
+        if weights.shape != free.shape:
+            raise ValueError(f"density map has {weights.size} cells, expected {free.size}")
+        usable = free & (weights > 0)
+        keys[usable] /= weights[usable]
+    else:
+        usable = free
+    keys[~usable] = np.inf
+
+    available = int(np.count_nonzero(usable))
+    if available < count:
+        raise ValueError(f"cannot place {count} entities, only {available} free cells")
+
+    chosen = np.argpartition(keys, count - 1)[:count]
+    free[chosen] = False
+    return chosen
+
+
+def build_world(size: int = 20, hideouts: int = 3, hunters: int = 3, knights: int = 4,
+                treasures: int = 15, seed: Optional[int] = None,
+                density: Optional[Dict[str, np.ndarray]] = None,
+                treasure_values: Sequence[float] = (3, 7, 13), player: bool = True) -> Grid:
+    """
+    Create a Grid and place every entity on its own cell in one pass.
+
+    density optionally maps "hideouts", "hunters", "knights" or "treasures"
+    to a (size, size) array of non-negative spawn weights indexed [y, x];
+    kinds without a map spawn uniformly. Cells are drawn from the grid's
+    spawning stream, so the same seed builds the same world. When player is
+    set, the first hunter is the player, as in EldoriaSimulation.
+    """
+    grid = Grid(size, seed)
+    density = density or {}
+    generator = grid.rng.spawning.generator
+    free = np.ones(size * size, dtype=bool)
+
+    def place(kind, count):
+        cells = sample_cells(generator, free, count, density.get(kind))
+        return zip((cells % size).tolist(), (cells // size).tolist())
+
+    for x, y in place("hideouts", hideouts):
+        grid.add_hideout(Hideout(x, y))
+
+    for i, (x, y) in enumerate(place("hunters", hunters)):
+        hunter = Hunter(x, y, SKILLS[i % len(SKILLS)])
+        grid.add_hunter(hunter)
+    if player and grid.hunters:
+        grid.hunters[0].is_player = True
+
+    for x, y in place("knights", knights):
+        grid.add_knight(Knight(x, y))
+
+    # Index rather than choice() over an array, so the caller's values keep their type
+    picks = generator.integers(len(treasure_values), size=treasures).tolist()
+    for (x, y), pick in zip(place("treasures", treasures), picks):
+        grid.add_treasure(Treasure(x, y, treasure_values[pick]))
+
+    return grid